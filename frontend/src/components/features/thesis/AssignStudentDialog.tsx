@@ -1,6 +1,7 @@
 import { Dialog, DialogContent, DialogTitle } from "@/components/ui/dialog"
 import { useEffect, useState } from "react"
 import { Button } from "@/components/ui/button"
+import { Input } from "@/components/ui/input"
 import apiUrl from "@/util/apiUrl"
 import {
   Select,
@@ -24,6 +25,20 @@ interface Student {
   email: string
 }
 
+interface StudentsPage {
+  next: string | null
+  results: Student[]
+}
+
+function fetchStudents(url: string): Promise<StudentsPage> {
+  const token = localStorage.getItem("token")
+  return fetch(url, {
+    headers: {
+      Authorization: `Bearer ${token}`,
+    },
+  }).then((res) => res.json())
+}
+
 export default function AssignStudentDialog({
   open,
   setOpen,
@@ -31,25 +46,43 @@ export default function AssignStudentDialog({
   thesisId,
 }: AssignStudentDialogProps) {
   const [students, setStudents] = useState<Student[]>([])
+  const [next, setNext] = useState<string | null>(null)
+  const [search, setSearch] = useState("")
   const [selectedId, setSelectedId] = useState<number | null>(null)
 
   useEffect(() => {
-    const token = localStorage.getItem("token")
-    if (open) {
-      fetch(`${apiUrl}/students/available/?thesis_id=${thesisId}`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
+    if (!open) return
+    // wait until the user stops typing before asking for the first page
+    const timer = setTimeout(() => {
+      const params = new URLSearchParams({
+        thesis_id: String(thesisId),
+        cursor: "",
+        search: search.trim(),
+      })
+      fetchStudents(`${apiUrl}/students/available/?${params}`).then((data) => {
+        setStudents(data.results)
+        setNext(data.next)
       })
-        .then((res) => res.json())
-        .then((data) => setStudents(data.students))
-    }
-  }, [open, thesisId])
+    }, 300)
+    return () => clearTimeout(timer)
+  }, [open, thesisId, search])
+
+  const loadMore = (url: string) => {
+    fetchStudents(url).then((data) => {
+      setStudents((current) => [...current, ...data.results])
+      setNext(data.next)
+    })
+  }
 
   return (
     <Dialog open={open} onOpenChange={setOpen}>
       <DialogContent>
         <DialogTitle>Przypisz studenta do pracy</DialogTitle>
+        <Input
+          placeholder="Szukaj po nazwisku lub adresie e-mail..."
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+        />
         <Select
           value={selectedId ? String(selectedId) : ""}
           onValueChange={(value) => setSelectedId(Number(value))}
@@ -63,6 +96,15 @@ export default function AssignStudentDialog({
                 {s.first_name} {s.last_name} ({s.email})
               </SelectItem>
             ))}
+            {next && (
+              <Button
+                variant="ghost"
+                className="w-full"
+                onClick={() => loadMore(next)}
+              >
+                Pokaż więcej
+              </Button>
+            )}
           </SelectContent>
         </Select>
         <ul className="space-y-2">
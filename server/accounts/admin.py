@@ -1,11 +1,29 @@
 from django.contrib import admin
-from .models import SystemUser, FieldOfStudy, OneTimePasswordLink
+from .authentication import forget_token_versions, revoke_tokens
+from .models import SystemUser, FieldOfStudy, OneTimePasswordLink, OutgoingMail
+
+# changing these makes the claims of issued tokens stale
+TOKEN_FIELDS = {'is_student', 'is_supervisor', 'is_dean', 'is_active', 'field_of_study'}
 
 @admin.register(SystemUser)
 class SystemUserAdmin(admin.ModelAdmin):
     list_display = ('email', 'first_name', 'last_name', 'is_staff', 'is_active')
     search_fields = ('email', 'first_name', 'last_name')
     list_filter = ('is_staff', 'is_active', 'is_student', 'is_supervisor', 'is_dean')
+    readonly_fields = ('token_version',)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if change and set(form.changed_data) & TOKEN_FIELDS:
+            revoke_tokens([form.instance.pk])
+
+    def delete_model(self, request, obj):
+        forget_token_versions([obj.pk])
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        forget_token_versions(queryset.values_list('pk', flat=True))
+        super().delete_queryset(request, queryset)
 
 @admin.register(FieldOfStudy)
 class FieldOfStudyAdmin(admin.ModelAdmin):
@@ -15,4 +33,9 @@ class FieldOfStudyAdmin(admin.ModelAdmin):
 @admin.register(OneTimePasswordLink)
 class OneTimePasswordLinkAdmin(admin.ModelAdmin):
     list_display = ('user', 'token', 'created_at', 'expires_at', 'used')
-    list_filter = ('used',)
\ No newline at end of file
+    list_filter = ('used',)
+
+@admin.register(OutgoingMail)
+class OutgoingMailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created_at', 'attempts', 'sent_at')
+    search_fields = ('recipient',)
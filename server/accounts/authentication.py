@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from utils.metrics import measure
+
+from . import models
+
+REVOKED = -1
+CLAIM_FIELDS = ('is_student', 'is_supervisor', 'is_dean')
+
+
+def _version_key(user_id):
+    return f"token_version:{user_id}"
+
+
+def get_token_version(user_id):
+    """
+    Current token version of a user, cached for TOKEN_VERSION_CACHE_TTL.
+    Deleted users get the REVOKED version.
+    """
+    user_id = models.SystemUser._meta.pk.to_python(user_id)
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = models.SystemUser.objects.filter(id=user_id).values_list('token_version', flat=True).first()
+        if version is None:
+            version = REVOKED
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TTL)
+    return version
+
+
+def forget_token_versions(user_ids):
+    keys = [_version_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def revoke_tokens(user_ids):
+    """
+    Invalidate all tokens issued to the given users, e.g. after their role or
+    fields of study changed. They have to log in again.
+    """
+    user_ids = list(user_ids)
+    models.SystemUser.objects.filter(id__in=user_ids).update(token_version=F('token_version') + 1)
+    forget_token_versions(user_ids)
+
+
+def stored_user(user):
+    """
+    The user's row as stored in the database. Users built from token claims
+    carry is_active and token_version from the token, which may be stale by
+    now, so they must not be saved; writes go through the stored row instead.
+    """
+    if getattr(user, 'from_claims', False):
+        return models.SystemUser.objects.get(pk=user.pk)
+    return user
+
+
+def add_user_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token['fos'] = user.field_of_study_ids
+    token['ver'] = user.token_version
+    return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication trusting the signed role and field-of-study claims.
+    request.user is a SystemUser with only those fields loaded; any other field
+    loads the rest of the row on first access. Views writing to the user load
+    it with stored_user first. Tokens are checked against the
+    cached token version of the user, so revoked tokens are rejected.
+    """
+
+    def authenticate(self, request):
+        with measure('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token:
+            # tokens issued before the claims were added
+            return super().get_user(validated_token)
+
+        user_id = models.SystemUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        if validated_token['ver'] != get_token_version(user_id):
+            raise AuthenticationFailed("Token został unieważniony, zaloguj się ponownie", code='token_revoked')
+
+        claims = {
+            'id': user_id,
+            'is_active': True,
+            'token_version': validated_token['ver'],
+            **{field: validated_token[field] for field in CLAIM_FIELDS},
+        }
+        # from_db expects the values in model field order
+        field_names = [field.attname for field in models.SystemUser._meta.concrete_fields if field.attname in claims]
+        user = models.SystemUser.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
+        user.from_claims = True
+        user.__dict__['field_of_study_ids'] = validated_token['fos']
+        return user
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+
+from .passwords import check_password, run_hashing
+
+UserModel = get_user_model()
+
+
+class OffloadedHashingBackend(ModelBackend):
+    """
+    ModelBackend hashing passwords on the bounded hashing executor, so in a
+    login storm the requests beyond its limit fail fast with 503 instead of
+    piling up on the request workers. Admitted logins still hold their worker
+    until the hash is done.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # hash anyway, so unknown and known e-mails take the same time
+            run_hashing(make_password, password)
+            return None
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from theses.transitions import release_theses
+from utils.deletion import can_delete_set_based, delete_set_based
+
+from . import models
+from .authentication import forget_token_versions
+
+
+def delete_users(user_ids, chunk_size=None, progress=None):
+    """
+    Delete users chunk by chunk: their theses are released with one UPDATE and
+    the users with their dependent rows are removed with plain DELETE
+    statements, unless the schema needs Django's deletion collector.
+    `progress` is called with the number of processed ids after every chunk.
+    """
+    chunk_size = chunk_size or settings.USER_DELETE_CHUNK_SIZE
+    set_based = can_delete_set_based(models.SystemUser)
+    deleted = 0
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        with transaction.atomic():
+            release_theses(chunk)
+            users = models.SystemUser.objects.filter(id__in=chunk)
+            if set_based:
+                deleted += delete_set_based(users)
+            else:
+                deleted += users.delete()[1].get(models.SystemUser._meta.label, 0)
+            forget_token_versions(chunk)
+            if progress is not None:
+                progress(start + len(chunk))
+    return deleted
+
+
+def run_deletion_job(job):
+    """
+    Process a claimed UserDeletionJob, saving its progress together with every
+    deleted chunk. A job whose worker died is claimed again once it has made no
+    progress for USER_DELETE_JOB_STALE_SECONDS, and resumes after the last saved
+    chunk. Returns False if the job failed.
+    """
+    def save_progress(processed):
+        models.UserDeletionJob.objects.filter(id=job.id).update(
+            processed=job.processed + processed,
+            updated_at=timezone.now()
+        )
+
+    try:
+        delete_users(job.user_ids[job.processed:], progress=save_progress)
+    except DatabaseError as error:
+        models.UserDeletionJob.objects.filter(id=job.id).update(
+            status=models.UserDeletionJob.FAILED,
+            last_error=repr(error),
+            finished_at=timezone.now()
+        )
+        return False
+    models.UserDeletionJob.objects.filter(id=job.id).update(
+        status=models.UserDeletionJob.DONE,
+        finished_at=timezone.now()
+    )
+    return True
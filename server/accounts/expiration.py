@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from theses.transitions import release_theses
+
+from . import models
+from .authentication import forget_token_versions
+
+
+def expire_batch(now, batch_size):
+    """
+    Deactivate up to `batch_size` accounts that expired before `now` and
+    release the theses they reserved. Deactivated accounts leave the partial
+    expiration index, so repeated calls simply continue where the last stopped.
+    """
+    with transaction.atomic():
+        user_ids = list(
+            models.SystemUser.objects.filter(is_active=True, expiration_date__lte=now)
+            .order_by('expiration_date', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            return 0
+        release_theses(user_ids)
+        models.SystemUser.objects.filter(id__in=user_ids).update(
+            is_active=False,
+            token_version=F('token_version') + 1,
+            updated_at=timezone.now()
+        )
+        forget_token_versions(user_ids)
+    return len(user_ids)
@@ -0,0 +1,116 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import models
+from .outbox import queue_access_mails
+from .passwords import provisioning_passwords
+from .serializers import link_fields_of_study, validate_user_email
+
+
+def decoded_lines(upload):
+    for line in upload:
+        yield line.decode('utf-8-sig')
+
+
+def read_csv(upload):
+    reader = csv.DictReader(decoded_lines(upload))
+    if reader.fieldnames is None or 'email' not in reader.fieldnames:
+        raise ValidationError("Plik CSV musi zawierać nagłówek z kolumną email")
+    for row in reader:
+        yield reader.line_num, row, None
+
+
+def read_ndjson(upload):
+    for line_number, line in enumerate(decoded_lines(upload), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Niepoprawny format JSON"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Niepoprawny format danych użytkownika!"
+            continue
+        yield line_number, row, None
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def read_rows(upload, file_format):
+    """
+    Lazily yield (line number, row, error) from an uploaded file, so only one
+    line is held in memory at a time.
+    """
+    return READERS[file_format](upload)
+
+
+def import_users(rows, user_type, fields_of_study, chunk_size=None):
+    """
+    Create users from an iterable of parsed rows, one transaction per chunk of
+    rows. Invalid rows are skipped and reported with their line numbers.
+    """
+    chunk_size = chunk_size or settings.USER_IMPORT_CHUNK_SIZE
+    rows = iter(rows)
+    created, errors = 0, []
+    while chunk := list(islice(rows, chunk_size)):
+        chunk_created, chunk_errors = import_chunk(chunk, user_type, fields_of_study)
+        created += chunk_created
+        errors += sorted(chunk_errors, key=lambda error: error['line'])
+    return {'created': created, 'errors': errors}
+
+
+def import_chunk(chunk, user_type, fields_of_study):
+    errors = []
+    candidates = {}
+    for line_number, row, error in chunk:
+        email = str(row.get('email') or '').strip() if row is not None else None
+        if error is None:
+            try:
+                validate_user_email(email, user_type)
+            except ValidationError as e:
+                error = str(e.detail[0])
+        if error is None and email in candidates:
+            error = f"Adres {email} powtarza się w pliku"
+        if error is not None:
+            errors.append({'line': line_number, 'email': email, 'error': error})
+            continue
+        candidates[email] = (line_number, row)
+
+    existing = set(models.SystemUser.objects.filter(email__in=candidates).values_list('email', flat=True))
+    for email in existing:
+        line_number, _ = candidates.pop(email)
+        errors.append({'line': line_number, 'email': email, 'error': f"Adres {email} jest już zajęty"})
+
+    users = [
+        models.SystemUser(
+            email=email,
+            first_name=str(row.get('first_name') or '').strip(),
+            last_name=str(row.get('last_name') or '').strip(),
+            password=password,
+            **{"is_" + user_type: True}
+        )
+        for (email, (_, row)), password in zip(candidates.items(), provisioning_passwords(len(candidates)))
+    ]
+    if not users:
+        return 0, errors
+
+    try:
+        with transaction.atomic():
+            users = models.SystemUser.objects.bulk_create(users)
+            link_fields_of_study(users, fields_of_study)
+            queue_access_mails(users)
+    except IntegrityError:
+        # an address was taken concurrently; report the whole chunk as not imported
+        errors += [
+            {'line': line_number, 'email': email, 'error': "Nie udało się zapisać użytkownika"}
+            for email, (line_number, _) in candidates.items()
+        ]
+        return 0, errors
+    return len(users), errors
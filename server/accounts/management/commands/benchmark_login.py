@@ -0,0 +1,75 @@
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from accounts import models
+from accounts.passwords import reset_hashing_executor
+from accounts.views import LoginView
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent logins at LoginView and report logins/s, latency and rejected (503) "
+        "requests, hashing inline and on the bounded hashing executor. The test user is removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=64)
+        parser.add_argument('--concurrency', type=int, default=16, help="Simultaneous clients")
+        parser.add_argument('--hash-threads', type=int, default=settings.PASSWORD_HASH_THREADS)
+        parser.add_argument('--max-pending', type=int, default=settings.PASSWORD_HASH_MAX_PENDING)
+
+    def handle(self, *args, **options):
+        email = f"bench-{uuid.uuid4().hex[:8]}@student.agh.edu.pl"
+        password = uuid.uuid4().hex
+        user = models.SystemUser.objects.create_user(email, "Jan", "Kowalski", password=password, is_student=True)
+        runs = [
+            ("inline", 0, 0),
+            (f"executor {options['hash_threads']}+{options['max_pending']}", options['hash_threads'], options['max_pending']),
+        ]
+        try:
+            self.stdout.write(
+                f"{'mode':<20} {'logins/s':>9} {'p50 [ms]':>9} {'p95 [ms]':>9} {'503':>5} {'other':>6}"
+            )
+            for label, threads, max_pending in runs:
+                with override_settings(PASSWORD_HASH_THREADS=threads, PASSWORD_HASH_MAX_PENDING=max_pending):
+                    reset_hashing_executor()
+                    self.report(label, *self.storm(email, password, options['requests'], options['concurrency']))
+        finally:
+            reset_hashing_executor()
+            user.delete()
+
+    def storm(self, email, password, requests, concurrency):
+        factory = APIRequestFactory()
+        view = LoginView.as_view()
+
+        def login(_):
+            request = factory.post("/api/user/login/", {"email": email, "password": password}, format="json")
+            start = time.perf_counter()
+            try:
+                code = view(request).status_code
+            finally:
+                connection.close()
+            return code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(login, range(requests)))
+        return results, time.perf_counter() - start
+
+    def report(self, label, results, elapsed):
+        codes = Counter(code for code, _ in results)
+        latencies = sorted(latency for code, latency in results if code == 200) or [0.0]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{label:<20} {codes[200] / elapsed:>9.2f} {statistics.median(latencies) * 1000:>9.0f} "
+            f"{p95 * 1000:>9.0f} {codes[503]:>5} {sum(codes.values()) - codes[200] - codes[503]:>6}"
+        )
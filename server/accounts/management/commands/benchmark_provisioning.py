@@ -0,0 +1,57 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from accounts import models, serializers
+from accounts.outbox import queue_access_mails
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure dean account provisioning throughput (users/s) with unusable passwords, "
+        "sequential hashing and pooled hashing. All created rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASH_WORKERS,
+                            help="Processes used by the pooled hashing run")
+        parser.add_argument('--skip-hashed', action='store_true', help="Only measure unusable passwords")
+
+    def handle(self, *args, **options):
+        runs = [("unusable", 'unusable', 1)]
+        if not options['skip_hashed']:
+            runs += [
+                ("hashed, 1 process", 'hashed', 1),
+                (f"hashed, {options['workers']} processes", 'hashed', options['workers']),
+            ]
+
+        self.stdout.write(f"{'mode':<24} {'users':>6} {'time [s]':>9} {'users/s':>9}")
+        for label, mode, workers in runs:
+            with override_settings(PROVISIONING_PASSWORDS=mode, PASSWORD_HASH_WORKERS=workers):
+                elapsed = self.provision(options['users'])
+            self.stdout.write(
+                f"{label:<24} {options['users']:>6} {elapsed:>9.2f} {options['users'] / elapsed:>9.1f}"
+            )
+
+    def provision(self, count):
+        prefix = uuid.uuid4().hex[:8]
+        with transaction.atomic():
+            field_of_study = models.FieldOfStudy.objects.create(name=f"bench-{prefix}")
+            serializer = serializers.DeanCreateUsersSerializer(data={
+                "userType": "student",
+                "newUsers": [{"email": f"bench-{prefix}-{i}@student.agh.edu.pl"} for i in range(count)],
+                "chosenFieldsOfStudy": [{"id": field_of_study.id}],
+                "expirationDate": "2999-01-01",
+            })
+            start = time.perf_counter()
+            if not serializer.is_valid():
+                raise CommandError(serializer.errors)
+            queue_access_mails(serializer.save())
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed
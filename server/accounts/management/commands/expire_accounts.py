@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.expiration import expire_batch
+
+
+class Command(BaseCommand):
+    help = "Deactivate expired accounts in batches and release the theses they reserved"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = 0
+        while count := expire_batch(now, options['batch_size']):
+            expired += count
+            self.stdout.write(f"Deactivated {expired} accounts")
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Deactivated {expired} expired accounts"))
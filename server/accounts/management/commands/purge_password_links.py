@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts import models
+
+
+class Command(BaseCommand):
+    help = "Delete used and expired one-time password links in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--keep-days', type=int, default=0,
+                            help="Keep expired links for this many days after they expire")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['keep_days'])
+        stale = models.OneTimePasswordLink.objects.filter(Q(used=True) | Q(expires_at__lt=cutoff))
+        deleted = 0
+        while True:
+            batch = list(stale.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            # the links have no dependants, so this is a single DELETE
+            count, _ = models.OneTimePasswordLink.objects.filter(id__in=batch).delete()
+            deleted += count
+            self.stdout.write(f"Deleted {deleted} links")
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} one-time password links"))
@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts import models
+from accounts.deletion import run_deletion_job
+
+
+class Command(BaseCommand):
+    help = "Process queued user deletion jobs created with DELETE /dean/users/?background=true"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs instead of exiting when idle")
+        parser.add_argument('--interval', type=float, default=5.0, help="Polling interval in seconds with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            job = self.claim()
+            if job is None:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            resumed = f" (resuming after {job.processed})" if job.processed else ""
+            self.stdout.write(f"Job {job.id}: deleting {job.total - job.processed} users{resumed}")
+            if run_deletion_job(job):
+                self.stdout.write(self.style.SUCCESS(f"Job {job.id} finished"))
+            else:
+                job.refresh_from_db()
+                self.stderr.write(self.style.ERROR(f"Job {job.id} failed: {job.last_error}"))
+
+    def claim(self):
+        """
+        The oldest pending job, or a running one whose worker stopped saving progress.
+        """
+        stale = timezone.now() - timedelta(seconds=settings.USER_DELETE_JOB_STALE_SECONDS)
+        with transaction.atomic():
+            job = models.UserDeletionJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=models.UserDeletionJob.PENDING) |
+                Q(status=models.UserDeletionJob.RUNNING, updated_at__lt=stale)
+            ).order_by('id').first()
+            if job is not None:
+                job.status = models.UserDeletionJob.RUNNING
+                job.save(update_fields=['status', 'updated_at'])
+        return job
@@ -0,0 +1,85 @@
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import models
+
+
+class Command(BaseCommand):
+    help = "Deliver queued OutgoingMail rows over a single reused SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.MAIL_BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=settings.MAIL_MAX_ATTEMPTS)
+        parser.add_argument('--backoff', type=int, default=settings.MAIL_RETRY_BACKOFF,
+                            help="Base retry delay in seconds, doubled after every failed attempt")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting when empty")
+        parser.add_argument('--interval', type=float, default=5.0, help="Polling interval in seconds with --loop")
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        sent = failed = 0
+        try:
+            while True:
+                batch_sent, batch_failed = self.send_batch(connection, options)
+                sent += batch_sent
+                failed += batch_failed
+                if batch_sent or batch_failed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} messages, {failed} failed attempts"))
+
+    def send_batch(self, connection, options):
+        sent = failed = 0
+        with transaction.atomic():
+            batch = list(
+                models.OutgoingMail.objects.select_for_update(skip_locked=True).filter(
+                    sent_at__isnull=True,
+                    send_after__lte=timezone.now(),
+                    attempts__lt=options['max_attempts'],
+                ).order_by('send_after', 'id')[:options['batch_size']]
+            )
+            if not batch:
+                return 0, 0
+
+            delivered, retried = [], []
+            for mail in batch:
+                message = EmailMessage(
+                    subject=mail.subject,
+                    body=mail.body,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[mail.recipient],
+                    connection=connection,
+                )
+                try:
+                    connection.open()
+                    message.send()
+                except (smtplib.SMTPException, OSError) as error:
+                    # drop the connection so the next message reconnects
+                    connection.close()
+                    mail.attempts += 1
+                    mail.last_error = repr(error)
+                    mail.send_after = timezone.now() + timedelta(
+                        seconds=options['backoff'] * 2 ** (mail.attempts - 1)
+                    )
+                    retried.append(mail)
+                    failed += 1
+                else:
+                    mail.sent_at = timezone.now()
+                    delivered.append(mail)
+                    sent += 1
+
+            models.OutgoingMail.objects.bulk_update(delivered, ['sent_at'])
+            models.OutgoingMail.objects.bulk_update(retried, ['attempts', 'last_error', 'send_after'])
+        self.stdout.write(f"Batch of {len(batch)}: {sent} sent, {failed} failed")
+        return sent, failed
@@ -5,7 +5,7 @@ from django.contrib.auth.hashers import make_password
 
 def create_superuser(apps, schema_editor):
     User = apps.get_model('accounts', 'SystemUser')
-    User.objects.create(
+    User.objects.using(schema_editor.connection.alias).create(
         email='admin@example.com',
         first_name='Admin',
         last_name='User',
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 10:45
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations, models
+
+import accounts.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0003_remove_fieldofstudy_description_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    )
+
+    operations = (
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(
+            sql="""
+                CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+                LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+                AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+            """,
+            reverse_sql="DROP FUNCTION IF EXISTS f_unaccent(text);",
+        ),
+        migrations.AddIndex(
+            model_name='systemuser',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(accounts.search.Unaccent(django.db.models.functions.text.Lower(django.db.models.functions.text.Concat(models.F('first_name'), models.Value(' '), models.F('last_name')))), name='gin_trgm_ops'), name='systemuser_name_trgm_idx'),
+        ),
+    )
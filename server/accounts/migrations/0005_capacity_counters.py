@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 10:46
+
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+TAKEN_STATUSES = ['Zarezerwowany', 'Student zaakceptowany', 'Zatwierdzony']
+
+
+def fill_counters(apps, schema_editor):
+    SystemUser = apps.get_model('accounts', 'SystemUser')
+    users = SystemUser.objects.using(schema_editor.connection.alias)
+    supervisors = users.annotate(
+        owned=Count('owned_theses'),
+        taken=Count('owned_theses', filter=Q(owned_theses__status__in=TAKEN_STATUSES)),
+    ).filter(owned__gt=0)
+    for supervisor in supervisors:
+        users.filter(id=supervisor.id).update(
+            thesis_count=supervisor.owned,
+            taken_spots=supervisor.taken,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0004_search_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('theses', '0003_thesis_search'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='systemuser',
+            name='taken_spots',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='systemuser',
+            name='thesis_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='systemuser',
+            name='free_spots',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('thesis_count'), '-', models.F('taken_spots')), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='systemuser',
+            index=models.Index(condition=models.Q(('is_supervisor', True)), fields=['free_spots', 'id'], name='systemuser_free_spots_idx'),
+        ),
+    )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0008_userdeletionjob'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='systemuser',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    )
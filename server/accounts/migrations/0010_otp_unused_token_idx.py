@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0009_token_version'),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name='onetimepasswordlink',
+            index=models.Index(condition=models.Q(('used', False)), fields=['token'], name='otp_unused_token_idx'),
+        ),
+    )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+import accounts.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0010_otp_unused_token_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    )
+
+    operations = (
+        migrations.AlterField(
+            model_name='systemuser',
+            name='expiration_date',
+            field=models.DateTimeField(default=accounts.models.default_expiration_date),
+        ),
+        migrations.AddIndex(
+            model_name='systemuser',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expiration_date', 'id'], name='systemuser_expiration_idx'),
+        ),
+    )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+import accounts.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0011_account_expiration'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    )
+
+    operations = (
+        migrations.AddIndex(
+            model_name='systemuser',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(accounts.search.Unaccent(django.db.models.functions.text.Lower(models.F('email'))), name='text_pattern_ops'), condition=models.Q(('is_student', True)), name='systemuser_student_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemuser',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(accounts.search.Unaccent(django.db.models.functions.text.Lower(models.F('last_name'))), name='text_pattern_ops'), condition=models.Q(('is_student', True)), name='systemuser_student_last_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemuser',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(accounts.search.Unaccent(django.db.models.functions.text.Lower(django.db.models.functions.text.Concat(models.F('first_name'), models.Value(' '), models.F('last_name')))), name='text_pattern_ops'), condition=models.Q(('is_student', True)), name='systemuser_student_name_idx'),
+        ),
+    )
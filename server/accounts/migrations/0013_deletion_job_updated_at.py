@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0012_student_prefix_indexes'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='userdeletionjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    )
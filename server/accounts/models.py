@@ -1,11 +1,16 @@
 
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin
 from django.utils import timezone
+from django.utils.functional import cached_property
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth import get_user_model
 import uuid
 
+from .search import full_name, normalized
+
 class UserManager(BaseUserManager):
     def create_user(self, email, first_name, last_name, password=None, **extra_fields):
         user = self.model(
@@ -24,15 +29,19 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, first_name, last_name, **extra_fields)
 
+def default_expiration_date():
+    return timezone.now() + relativedelta(years=10)
+
 class FieldOfStudy(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 class SystemUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=255, default="")
     last_name = models.CharField(max_length=255, default="")
     field_of_study = models.ManyToManyField(FieldOfStudy)
-    expiration_date = models.DateTimeField(default=timezone.now() + relativedelta(years=10))
+    expiration_date = models.DateTimeField(default=default_expiration_date)
 
     is_student = models.BooleanField(default=False)
     is_supervisor = models.BooleanField(default=False)
@@ -41,9 +50,18 @@ class SystemUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    token_version = models.PositiveIntegerField(default=0)
 
     description = models.TextField(null=True, blank=True)
     total_spots = models.PositiveIntegerField(default=0)
+    thesis_count = models.PositiveIntegerField(default=0)
+    taken_spots = models.PositiveIntegerField(default=0)
+    free_spots = models.GeneratedField(
+        expression=models.F('thesis_count') - models.F('taken_spots'),
+        output_field=models.IntegerField(),
+        db_persist=True
+    )
 
     title = models.CharField(
         max_length=20,
@@ -54,6 +72,49 @@ class SystemUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     objects = UserManager()
 
+    @cached_property
+    def field_of_study_ids(self):
+        return list(self.field_of_study.values_list('id', flat=True))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # users built from token claims load the rest of their row in one query
+        if fields is not None and getattr(self, 'from_claims', False):
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using, fields, from_queryset)
+
+    class Meta:
+        indexes = (
+            GinIndex(
+                OpClass(normalized(full_name()), name='gin_trgm_ops'),
+                name='systemuser_name_trgm_idx'
+            ),
+            models.Index(
+                fields=['free_spots', 'id'],
+                condition=models.Q(is_supervisor=True),
+                name='systemuser_free_spots_idx'
+            ),
+            models.Index(
+                fields=['expiration_date', 'id'],
+                condition=models.Q(is_active=True),
+                name='systemuser_expiration_idx'
+            ),
+            models.Index(
+                OpClass(normalized('email'), name='text_pattern_ops'),
+                condition=models.Q(is_student=True),
+                name='systemuser_student_email_idx'
+            ),
+            models.Index(
+                OpClass(normalized('last_name'), name='text_pattern_ops'),
+                condition=models.Q(is_student=True),
+                name='systemuser_student_last_idx'
+            ),
+            models.Index(
+                OpClass(normalized(full_name()), name='text_pattern_ops'),
+                condition=models.Q(is_student=True),
+                name='systemuser_student_name_idx'
+            ),
+        )
+
 User = get_user_model()
 class OneTimePasswordLink(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -61,5 +122,50 @@ class OneTimePasswordLink(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     used = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=['token'],
+                condition=models.Q(used=False),
+                name='otp_unused_token_idx'
+            ),
+        )
+
     def is_expired(self):
-        return timezone.now() > self.expires_at
\ No newline at end of file
+        return timezone.now() > self.expires_at
+
+class OutgoingMail(models.Model):
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True, default=None)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=['send_after', 'id'],
+                condition=models.Q(sent_at__isnull=True),
+                name='outgoingmail_pending_idx'
+            ),
+        )
+
+class UserDeletionJob(models.Model):
+    PENDING = "Oczekuje"
+    RUNNING = "W trakcie"
+    DONE = "Zakończone"
+    FAILED = "Błąd"
+
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    user_ids = ArrayField(models.BigIntegerField())
+    total = models.PositiveIntegerField()
+    processed = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, default=PENDING)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True, default=None)
@@ -0,0 +1,35 @@
+import os
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from . import models
+
+ACCESS_LINK_TTL_DAYS = 2
+ACCESS_MAIL_SUBJECT = "Dostęp do systemu DyplomNet"
+
+
+def set_password_url(token):
+    return f"{os.getenv('CORS_ALLOWED_ORIGINS')}/set_password?{urlencode({'token': str(token)})}"
+
+
+def queue_access_mails(users):
+    """
+    Create one-time password links for freshly created users and queue the
+    mails carrying them. Delivery is left to the send_outbox command.
+    """
+    expires_at = timezone.now() + timedelta(days=ACCESS_LINK_TTL_DAYS)
+    links = models.OneTimePasswordLink.objects.bulk_create(
+        models.OneTimePasswordLink(user=user, expires_at=expires_at)
+        for user in users
+    )
+    models.OutgoingMail.objects.bulk_create(
+        models.OutgoingMail(
+            recipient=link.user.email,
+            subject=ACCESS_MAIL_SUBJECT,
+            body=f"Witaj w systemie DyplomNet!\n\nOtwórz poniższy link aby ustawić swoje hasło dostępu. Link jest ważny {ACCESS_LINK_TTL_DAYS} dni.\n\n{set_password_url(link.token)}\n\nW razie utraty ważności linku skontaktuj się z dziekanatem.",
+        )
+        for link in links
+    )
+    return links
@@ -0,0 +1,147 @@
+import os
+import secrets
+import string
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import make_password
+from rest_framework.exceptions import APIException
+
+PASSWORD_LENGTH = int(os.getenv('PASSWORD_LENGTH'))
+PASSWORD_ALPHABET = string.ascii_letters + string.digits + string.punctuation
+
+
+def random_secret():
+    return ''.join(secrets.choice(PASSWORD_ALPHABET) for _ in range(PASSWORD_LENGTH))
+
+
+def _setup_worker():
+    # needed when workers are spawned instead of forked
+    django.setup()
+
+
+def hash_passwords(raw_passwords, workers=None):
+    """
+    Hash many passwords, spreading the work over a process pool since every
+    hash is a CPU-bound key derivation.
+    """
+    raw_passwords = list(raw_passwords)
+    workers = min(workers or settings.PASSWORD_HASH_WORKERS, len(raw_passwords))
+    if workers <= 1:
+        return [make_password(password) for password in raw_passwords]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as executor:
+        return list(executor.map(make_password, raw_passwords, chunksize=max(len(raw_passwords) // (workers * 4), 1)))
+
+
+def provisioning_passwords(count, mode=None):
+    """
+    Password hashes for accounts created by the dean office. By default the
+    accounts get unusable passwords and users set their own through the
+    one-time password link; `hashed` keeps the old random-password behaviour.
+    """
+    mode = mode or settings.PROVISIONING_PASSWORDS
+    if mode == 'hashed':
+        return hash_passwords(random_secret() for _ in range(count))
+    return [make_password(None) for _ in range(count)]
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = "Serwer jest przeciążony, spróbuj ponownie za chwilę."
+    default_code = 'hashing_busy'
+    wait = 1
+
+
+class HashingExecutor:
+    """
+    Concurrency limiter for password hashes. The views calling it are
+    synchronous, so the request worker (a WSGI thread, or the thread
+    sync_to_async runs the view in under ASGI) still waits for the whole hash;
+    the executor does not free it. What it bounds is how many hashes run at
+    once (`threads`; PBKDF2 releases the GIL, so they run in parallel) and how
+    many requests may wait for one (`max_pending`). Beyond that a request is
+    rejected at once with HashingBusy instead of queueing behind the others.
+    """
+
+    def __init__(self, threads, max_pending, timeout):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(threads + max_pending)
+        self.timeout = timeout
+
+    def run(self, func, *args):
+        """
+        Call func(*args) on a hashing thread and block until it returns.
+        """
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # the slot stays taken until the hash completes
+            raise HashingBusy() from None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None and settings.PASSWORD_HASH_THREADS > 0:
+                _executor = HashingExecutor(
+                    settings.PASSWORD_HASH_THREADS,
+                    settings.PASSWORD_HASH_MAX_PENDING,
+                    settings.PASSWORD_HASH_TIMEOUT,
+                )
+    return _executor
+
+
+def reset_hashing_executor():
+    """
+    Drop the executor so the next hash builds one from the current settings.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+
+
+def run_hashing(func, *args):
+    executor = get_hashing_executor()
+    if executor is None:
+        return func(*args)
+    return executor.run(func, *args)
+
+
+def check_password(user, raw_password):
+    """
+    User.check_password with the hash computed on the hashing executor.
+    Hashes made with outdated parameters are upgraded like Django does.
+    """
+    encoded = user.password
+    if not run_hashing(hashers.check_password, raw_password, encoded):
+        return False
+    if hashers.identify_hasher(encoded).must_update(encoded):
+        user.password = run_hashing(make_password, raw_password)
+        user.save(update_fields=['password'])
+    return True
+
+
+def set_password(user, raw_password):
+    user.password = run_hashing(make_password, raw_password)
@@ -0,0 +1,25 @@
+from django.db.models import F, Func, TextField, Value
+from django.db.models.functions import Concat, Lower
+
+
+class Unaccent(Func):
+    """
+    Immutable wrapper around `unaccent` (created in migrations), so that it can
+    be used in index expressions.
+    """
+    function = 'f_unaccent'
+    output_field = TextField()
+
+
+def normalized(expression):
+    if isinstance(expression, str):
+        expression = F(expression)
+    return Unaccent(Lower(expression))
+
+
+def normalized_phrase(phrase):
+    return Unaccent(Lower(Value(phrase)))
+
+
+def full_name(prefix=''):
+    return Concat(F(f'{prefix}first_name'), Value(' '), F(f'{prefix}last_name'))
@@ -1,18 +1,20 @@
 
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 from . import models
+from .authentication import add_user_claims, get_token_version
+from .passwords import provisioning_passwords
 import os
 import datetime
-import secrets
-import string
 
 ALLOWED_DOMAINS = os.getenv('ALLOWED_DOMAINS').split(",")
 USER_TYPES = os.getenv('USER_TYPES').split(",")
-PASSWORD_LENGTH = int(os.getenv('PASSWORD_LENGTH'))
+IMPORT_FILE_FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
 
 def validate_email(email):
     try:
@@ -23,6 +25,38 @@ def validate_email(email):
         raise serializers.ValidationError(f'Niedozwolona domena {domain}. Jedyne dozwolone to {", ".join(ALLOWED_DOMAINS)}')
     return domain
 
+def validate_user_email(email, user_type):
+    domain = validate_email(email)
+    if (
+        (domain == "student.agh.edu.pl" and user_type != "student") or
+        (domain == "agh.edu.pl" and user_type == "student")
+    ):
+        raise serializers.ValidationError("Niepoprawna domena dla danego typu użytkownika")
+    return domain
+
+def link_fields_of_study(users, fields_of_study):
+    """
+    Assign fields of study to many users with a single insert into the M2M table.
+    """
+    Through = models.SystemUser.field_of_study.through
+    Through.objects.bulk_create(
+        Through(systemuser_id=user.id, fieldofstudy_id=field_of_study.id)
+        for user in users
+        for field_of_study in fields_of_study
+    )
+
+class UserUpdateSerializer(serializers.ModelSerializer):
+    """
+    Saves only the validated fields, so the capacity counters and token
+    version updated concurrently on the same row are not written back.
+    """
+
+    def update(self, instance, validated_data):
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
 class RegisterSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -73,14 +107,7 @@ class DeanCreateUsersSerializer(serializers.Serializer):
         for user_data in new_users:
             if not isinstance(user_data, dict):
                 raise serializers.ValidationError('Niepoprawny format danych użytkownika!')
-            domain = validate_email(user_data.get('email', ''))
-            if (
-                (domain == "student.agh.edu.pl" and user_type != "student") or
-                (domain == "agh.edu.pl" and user_type == "student")
-            ):
-                raise serializers.ValidationError("Niepoprawna domena dla danego typu użytkownika")
-
-            user_data["password"] = make_password(''.join(secrets.choice(string.ascii_letters + string.digits + string.punctuation) for _ in range(PASSWORD_LENGTH)))
+            validate_user_email(user_data.get('email', ''), user_type)
 
         existing_users = models.SystemUser.objects.filter(email__in=map(lambda u: u.get('email'), new_users))
         if existing_users.count() > 0:
@@ -107,20 +134,53 @@ class DeanCreateUsersSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         users = []
-        for user_data in validated_data["newUsers"]:
+        passwords = provisioning_passwords(len(validated_data["newUsers"]))
+        # accounts stay valid through the whole expiration day
+        expiration_date = timezone.make_aware(datetime.datetime.combine(
+            validated_data["expirationDate"] + datetime.timedelta(days=1), datetime.time.min
+        ))
+        for user_data, password in zip(validated_data["newUsers"], passwords):
             user_type = "is_" + validated_data["userType"]
             user_dict = {
                 "email": user_data["email"],
-                "password": user_data["password"],
+                "password": password,
+                "expiration_date": expiration_date,
                 user_type: True
             }
             users.append(models.SystemUser(**user_dict))
         with transaction.atomic():
             add_result = models.SystemUser.objects.bulk_create(users)
-            for user in add_result:
-                user.field_of_study.set(validated_data["fields_of_study"])
+            link_fields_of_study(add_result, validated_data["fields_of_study"])
         return add_result
 
+class DeanImportUsersSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    fileFormat = serializers.ChoiceField(('csv', 'ndjson'), required=False)
+    userType = serializers.ChoiceField(USER_TYPES)
+    chosenFieldsOfStudy = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        default=list
+    )
+
+    def validate(self, data):
+        if 'fileFormat' not in data:
+            extension = os.path.splitext(data['file'].name)[1].lower()
+            if extension not in IMPORT_FILE_FORMATS:
+                raise serializers.ValidationError("Nie można rozpoznać formatu pliku, podaj fileFormat (csv lub ndjson)")
+            data['fileFormat'] = IMPORT_FILE_FORMATS[extension]
+
+        fos_ids = set(data['chosenFieldsOfStudy'])
+        if len(fos_ids) == 0 and data['userType'].lower() != "dean":
+            raise serializers.ValidationError("Należy podać kierunek studiów przy tworzenia użytkownika!")
+        fields_of_study = list(models.FieldOfStudy.objects.filter(id__in=fos_ids))
+        if len(fields_of_study) != len(fos_ids):
+            invalid_fos = fos_ids.difference(f.id for f in fields_of_study)
+            raise serializers.ValidationError(f"Kierunki {', '.join(map(str, sorted(invalid_fos)))} nie istnieją")
+
+        data['fields_of_study'] = fields_of_study
+        return data
+
 class DeanDeleteUsersSerializer(serializers.Serializer):
     usersToDelete = serializers.ListField(
         child=serializers.DictField(
@@ -141,6 +201,11 @@ class DeanDeleteUsersSerializer(serializers.Serializer):
 
         return users
 
+class UserDeletionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.UserDeletionJob
+        fields = ('id', 'status', 'total', 'processed', 'last_error', 'created_at', 'finished_at')
+
 class LoginSerializer(TokenObtainPairSerializer):
     def get_token(self, user):
         token = super().get_token(user)
@@ -154,12 +219,19 @@ class LoginSerializer(TokenObtainPairSerializer):
         else:
             token['role'] = 'unknown'
 
-        return token
+        return add_user_claims(token, user)
 
     def validate(self, attrs):
         data = super().validate(attrs)
         return data
 
+class RefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if 'ver' in refresh and refresh['ver'] != get_token_version(refresh[api_settings.USER_ID_CLAIM]):
+            raise InvalidToken("Token został unieważniony, zaloguj się ponownie")
+        return super().validate(attrs)
+
 class FieldOfStudySerializer(serializers.ModelSerializer):
     class Meta:
         model = models.FieldOfStudy
@@ -181,6 +253,15 @@ class SupervisorSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'title', 'first_name', 'last_name', 'field_of_study',
                   'free_spots', 'thesis_count', 'total_spots', 'description')
 
+class PreloadedSupervisorSerializer(SupervisorSerializer):
+    """
+    SupervisorSerializer taking the fields of study from the context, so they can be loaded separately.
+    """
+    field_of_study = serializers.SerializerMethodField()
+
+    def get_field_of_study(self, obj):
+        return self.context['fields_of_study']
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
     new_password = serializers.CharField(required=True)
@@ -189,7 +270,7 @@ class SetPasswordSerializer(serializers.Serializer):
     token = serializers.CharField(required=True)
     password  = serializers.CharField(required=True)
 
-class PersonalDataSerializer(serializers.ModelSerializer):
+class PersonalDataSerializer(UserUpdateSerializer):
     class Meta:
         model = models.SystemUser
         fields = ('first_name', 'last_name', 'email', 'title', 'total_spots')
@@ -197,7 +278,7 @@ class PersonalDataSerializer(serializers.ModelSerializer):
     def validate_total_spots(self, value):
         user = self.instance
         if user and user.is_supervisor:
-            current_theses = user.owned_theses.count()
+            current_theses = user.thesis_count
             if value is not None and value < current_theses:
                 raise serializers.ValidationError(
                     f" Nie można ustawić limitu poniżej liczby aktualnie nadzorowanych prac dyplomowych ({current_theses})."
@@ -217,11 +298,18 @@ class SupervisorViewSerializer(serializers.ModelSerializer):
         )
 
     def get_free_spots(self, obj):
-        taken_statuses = ['Zarezerwowany', 'Student zaakceptowany', 'Zatwierdzony']
-        taken_spots = obj.owned_theses.filter(status__in=taken_statuses).count()
-        return obj.total_spots - taken_spots
+        return obj.total_spots - obj.taken_spots
+
+class BootstrapSupervisorSerializer(SupervisorViewSerializer):
+    """
+    SupervisorViewSerializer reusing the fields of study already loaded for the bootstrap response.
+    """
+    field_of_study = serializers.SerializerMethodField()
+
+    def get_field_of_study(self, obj):
+        return self.context['fields_of_study']
     
-class DescriptionSerializer(serializers.ModelSerializer):
+class DescriptionSerializer(UserUpdateSerializer):
     class Meta:
         model = models.SystemUser
         fields = ('description',)
\ No newline at end of file
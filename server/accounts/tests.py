@@ -1,2 +1,192 @@
+import threading
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from theses import models as thesis_models
+
+from . import models, serializers
+from .authentication import add_user_claims
+from .passwords import (
+    HashingBusy,
+    HashingExecutor,
+    get_hashing_executor,
+    reset_hashing_executor,
+)
+
+
+def authorized_client(user):
+    client = APIClient()
+    token = add_user_claims(RefreshToken.for_user(user), user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+class ClaimsUserWriteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = models.SystemUser.objects.create(
+            email="promotor@agh.edu.pl", first_name="Jan", last_name="Kowalski",
+            is_supervisor=True, total_spots=5
+        )
+        self.client = authorized_client(self.user)
+
+    def test_write_keeps_stored_state(self):
+        # caches the token version, as another worker would
+        self.assertEqual(self.client.get("/api/user/personal_data/").status_code, 200)
+        models.SystemUser.objects.filter(id=self.user.id).update(is_active=False, token_version=1)
+        updated_at = models.SystemUser.objects.get(id=self.user.id).updated_at
+
+        response = self.client.put("/api/user/personal_data/", {"first_name": "Adam"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        user = models.SystemUser.objects.get(id=self.user.id)
+        self.assertEqual(user.first_name, "Adam")
+        self.assertFalse(user.is_active)
+        self.assertEqual(user.token_version, 1)
+        self.assertGreater(user.updated_at, updated_at)
+
+    def test_description_write_keeps_stored_state(self):
+        self.assertEqual(self.client.get("/api/user/description/").status_code, 200)
+        models.SystemUser.objects.filter(id=self.user.id).update(token_version=1)
+
+        response = self.client.put("/api/user/description/", {"description": "Opis"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        user = models.SystemUser.objects.get(id=self.user.id)
+        self.assertEqual(user.description, "Opis")
+        self.assertEqual(user.token_version, 1)
+
+
+class CapacityCounterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.supervisor = models.SystemUser.objects.create(
+            email="promotor@agh.edu.pl", is_supervisor=True, total_spots=5
+        )
+        self.student = models.SystemUser.objects.create(email="student@student.agh.edu.pl", is_student=True)
+
+    def test_field_of_study_deletion_rebuilds_counters(self):
+        kept, deleted = models.FieldOfStudy.objects.bulk_create([
+            models.FieldOfStudy(name="Informatyka"), models.FieldOfStudy(name="Elektronika")
+        ])
+        thesis_models.Thesis.objects.bulk_create([
+            thesis_models.Thesis(name="A", owner=self.supervisor, field_of_study=kept, status="Dostępny"),
+            thesis_models.Thesis(
+                name="B", owner=self.supervisor, field_of_study=deleted,
+                status="Zarezerwowany", producer=self.student
+            ),
+        ])
+        models.SystemUser.objects.filter(id=self.supervisor.id).update(thesis_count=2, taken_spots=1)
+        dean = models.SystemUser.objects.create(email="dziekan@agh.edu.pl", is_dean=True)
+
+        response = authorized_client(dean).delete(f"/api/field_of_study/{deleted.id}/")
+
+        self.assertEqual(response.status_code, 204)
+        supervisor = models.SystemUser.objects.get(id=self.supervisor.id)
+        self.assertEqual((supervisor.thesis_count, supervisor.taken_spots, supervisor.free_spots), (1, 0, 1))
+
+    def test_update_keeps_concurrent_counters(self):
+        user = models.SystemUser.objects.get(id=self.supervisor.id)
+        models.SystemUser.objects.filter(id=user.id).update(thesis_count=3, taken_spots=2)
+
+        serializer = serializers.PersonalDataSerializer(user, data={"total_spots": 6}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+
+        user = models.SystemUser.objects.get(id=user.id)
+        self.assertEqual((user.total_spots, user.thesis_count, user.taken_spots), (6, 3, 2))
+
+
+class DeletionJobTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = models.SystemUser.objects.bulk_create([
+            models.SystemUser(email=f"student{i}@student.agh.edu.pl", is_student=True) for i in range(3)
+        ])
+        user_ids = [user.id for user in self.users]
+        # the worker died after deleting the first user
+        models.SystemUser.objects.filter(id=user_ids[0]).delete()
+        self.job = models.UserDeletionJob.objects.create(
+            user_ids=user_ids, total=len(user_ids), processed=1, status=models.UserDeletionJob.RUNNING
+        )
+
+    def run_jobs(self):
+        call_command('run_deletion_jobs', stdout=StringIO(), stderr=StringIO())
+        self.job.refresh_from_db()
+
+    def test_stale_running_job_is_resumed(self):
+        stale = timezone.now() - timedelta(seconds=settings.USER_DELETE_JOB_STALE_SECONDS + 1)
+        models.UserDeletionJob.objects.filter(id=self.job.id).update(updated_at=stale)
+
+        self.run_jobs()
+
+        self.assertEqual((self.job.status, self.job.processed), (models.UserDeletionJob.DONE, 3))
+        self.assertFalse(models.SystemUser.objects.filter(id__in=self.job.user_ids).exists())
+
+    def test_running_job_with_recent_progress_is_left_alone(self):
+        self.run_jobs()
+
+        self.assertEqual((self.job.status, self.job.processed), (models.UserDeletionJob.RUNNING, 1))
+        self.assertEqual(models.SystemUser.objects.filter(id__in=self.job.user_ids).count(), 2)
+
+
+class HashingExecutorTests(TestCase):
+    """
+    With every thread and pending slot taken, hashes are rejected at once.
+    """
+
+    def setUp(self):
+        self.release = threading.Event()
+
+    def occupy(self, executor):
+        started = threading.Event()
+
+        def hash_slowly():
+            started.set()
+            self.release.wait(5)
+
+        waiter = threading.Thread(target=executor.run, args=(hash_slowly,))
+        waiter.start()
+        self.addCleanup(waiter.join)
+        self.addCleanup(self.release.set)
+        started.wait(5)
+
+    def test_busy_when_full(self):
+        executor = HashingExecutor(threads=1, max_pending=0, timeout=5)
+        self.addCleanup(executor.shutdown)
+        self.occupy(executor)
+
+        with self.assertRaises(HashingBusy):
+            executor.run(str, "hasło")
+
+        self.release.set()
+        executor.executor.submit(lambda: None).result(5)
+        self.assertEqual(executor.run(str, "hasło"), "hasło")
+
+    @override_settings(PASSWORD_HASH_THREADS=1, PASSWORD_HASH_MAX_PENDING=0)
+    def test_login_rejected_when_full(self):
+        models.SystemUser.objects.create_user(
+            "student@student.agh.edu.pl", "Jan", "Kowalski", password="haslo123", is_student=True
+        )
+        reset_hashing_executor()
+        self.addCleanup(reset_hashing_executor)
+        self.occupy(get_hashing_executor())
+
+        response = self.client.post(
+            "/api/user/login/", {"email": "student@student.agh.edu.pl", "password": "haslo123"},
+            content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
@@ -1,15 +1,18 @@
 from django.urls import path
 from . import views
-from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('dean/users/', views.DeanView.as_view(), name='dean_delete'),
+    path('dean/users/import/', views.DeanImportView.as_view(), name='dean_import'),
+    path('dean/users/jobs/<int:job_id>/', views.DeanDeletionJobView.as_view(), name='dean_deletion_job'),
+    path('dean/db_pool/', views.DeanDatabasePoolView.as_view(), name='dean_db_pool'),
     path('user/login/', views.LoginView.as_view(), name='login'),
-    path('user/login/refresh/', TokenRefreshView.as_view(), name='refresh'),
+    path('user/login/refresh/', views.RefreshView.as_view(), name='refresh'),
     path("set_password/", views.OneTimePasswordView.as_view(), name="set_password"),
     path('user/new_password/', views.ChangePasswordView.as_view(), name='change_password'),
     path('user/personal_data/', views.PersonalDataView.as_view(), name='personal_data'),
+    path('user/bootstrap/', views.BootstrapView.as_view(), name='bootstrap'),
     path('field_of_study/', views.FieldOfStudyView.as_view(), name='field_of_study'),
     path('field_of_study/<int:pk>/', views.FieldOfStudyView.as_view(), name='field_of_study'),
     path('user/fields_of_study/', views.FieldOfStudyListView.as_view(), name='fields_of_study'),
@@ -1,21 +1,26 @@
 from rest_framework import status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from .models import OneTimePasswordLink
-from django.utils.http import urlencode
 from django.http import HttpResponseGone
-from django.utils import timezone
-from datetime import timedelta
 from . import permissions, models
 from . import serializers
+from .authentication import revoke_tokens, stored_user
+from .deletion import delete_users
+from .imports import import_users, read_rows
+from .outbox import queue_access_mails
+from .passwords import check_password, set_password
 from theses import models as thesis_models
-import os
+from theses.capacity import rebuild_capacity
+from theses import serializers as thesis_serializers
+from utils.cache import bump_version, cached_data, cached_json_response
+from utils.db_pool import pool_stats
 
 
 class RegisterView(APIView):
@@ -39,54 +44,82 @@ class DeanView(APIView):
     def post(self, request):
         serializer = serializers.DeanCreateUsersSerializer(data=request.data)
         if serializer.is_valid():
-            result = serializer.save()
-            # mailing logic
-            for user in result:
-                otp_ttl_days = 2
-                otp = OneTimePasswordLink.objects.create(
-                    user=user,
-                    expires_at=timezone.now() + timedelta(days=otp_ttl_days)
-                )
-                url = f"{os.getenv('CORS_ALLOWED_ORIGINS')}/set_password?{urlencode({'token': str(otp.token)})}"
-                subject = "Dostęp do systemu DyplomNet"
-                message = f"Witaj w systemie DyplomNet!\n\nOtwórz poniższy link aby ustawić swoje hasło dostępu. Link jest ważny {otp_ttl_days} dni.\n\n{url}\n\nW razie utraty ważności linku skontaktuj się z dziekanatem."
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=False,
-                )
+            with transaction.atomic():
+                result = serializer.save()
+                queue_access_mails(result)
             return Response(status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request):
         serializer = serializers.DeanDeleteUsersSerializer(data=request.data)
         if serializer.is_valid():
-            users = serializer.validated_data
-
-            for user in filter(lambda u: u.is_student, users):
-                try:
-                    thesis = thesis_models.Thesis.objects.get(producer=user)
-                except thesis_models.Thesis.DoesNotExist:
-                    continue
-                thesis.status = "Dostępny"
-                thesis.save()
+            user_ids = list(serializer.validated_data.values_list('id', flat=True))
+            if request.query_params.get('background') == 'true':
+                job = models.UserDeletionJob.objects.create(
+                    requested_by=request.user,
+                    user_ids=user_ids,
+                    total=len(user_ids)
+                )
+                return Response(serializers.UserDeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-            users.delete()
+            with transaction.atomic():
+                delete_users(user_ids)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class DeanDeletionJobView(APIView):
+    permission_classes = (IsAuthenticated, permissions.IsDean)
+
+    def get(self, request, job_id):
+        try:
+            job = models.UserDeletionJob.objects.get(id=job_id)
+        except models.UserDeletionJob.DoesNotExist:
+            return Response({"error": "Nie znaleziono zadania usuwania"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(serializers.UserDeletionJobSerializer(job).data)
+
+
+class DeanDatabasePoolView(APIView):
+    permission_classes = (IsAuthenticated, permissions.IsDean)
+
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class DeanImportView(APIView):
+    """
+    Streaming user import from a CSV or NDJSON file, inserted in chunks.
+    """
+    permission_classes = (IsAuthenticated, permissions.IsDean)
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request):
+        serializer = serializers.DeanImportUsersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        result = import_users(
+            read_rows(data['file'], data['fileFormat']),
+            data['userType'],
+            data['fields_of_study'],
+        )
+        if result['created'] == 0 and result['errors']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
 class LoginView(TokenObtainPairView):
     serializer_class = serializers.LoginSerializer
 
 
+class RefreshView(TokenRefreshView):
+    serializer_class = serializers.RefreshSerializer
+
+
 class OneTimePasswordView(APIView):
     def get(self, request):
         token = request.query_params.get("token")
         try:
-            link = OneTimePasswordLink.objects.get(token=token, used=False)
+            link = OneTimePasswordLink.objects.select_related('user').get(token=token, used=False)
         except OneTimePasswordLink.DoesNotExist:
             return HttpResponseGone("Ten link wygasł lub został już użyty.")
         
@@ -101,7 +134,7 @@ class OneTimePasswordView(APIView):
             token = serializer.validated_data['token']
             password = serializer.validated_data['password']
             try:
-                link = OneTimePasswordLink.objects.get(token=token, used=False)
+                link = OneTimePasswordLink.objects.select_related('user').get(token=token, used=False)
             except OneTimePasswordLink.DoesNotExist:
                 return HttpResponseGone("Ten link wygasł lub został już użyty.")
 
@@ -109,11 +142,12 @@ class OneTimePasswordView(APIView):
                 return HttpResponseGone("Ten link wygasł.")
 
             user = link.user
-            user.set_password(password)
-            user.save()
-
-            link.used = True
-            link.save()
+            set_password(user, password)
+            with transaction.atomic():
+                # a link can be used only once, even by concurrent requests
+                if not OneTimePasswordLink.objects.filter(id=link.id, used=False).update(used=True):
+                    return HttpResponseGone("Ten link wygasł lub został już użyty.")
+                user.save(update_fields=['password'])
 
             return Response({"message": "Hasło zostało ustawione pomyślnie."}, status=status.HTTP_200_OK)
 
@@ -128,11 +162,11 @@ class ChangePasswordView(APIView):
         serializer = serializers.ChangePasswordSerializer(data=request.data)
         if serializer.is_valid():
             user = request.user
-            if not user.check_password(serializer.validated_data['old_password']):
+            if not check_password(user, serializer.validated_data['old_password']):
                 return Response({'error': 'Invalid old password'}, status=status.HTTP_400_BAD_REQUEST)
 
-            user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            set_password(user, serializer.validated_data['new_password'])
+            user.save(update_fields=['password'])
             return Response({'message': 'Password changed successfully'}, status=status.HTTP_200_OK)
 
         print(serializer.errors)
@@ -147,7 +181,7 @@ class PersonalDataView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
-        serializer = serializers.PersonalDataSerializer(request.user, data=request.data, partial=True)
+        serializer = serializers.PersonalDataSerializer(stored_user(request.user), data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -161,18 +195,57 @@ class PersonalDataView(APIView):
         return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BootstrapView(APIView):
+    """
+    Everything the frontend loads after login in one response. Fields of study
+    and tags come from the reference cache, so with claim-based authentication
+    the only query is the one loading the user's row.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        user = request.user
+        field_of_study_ids = set(user.field_of_study_ids)
+        fields_of_study = [
+            field_of_study for field_of_study in cached_data(
+                "fields_of_study", "all",
+                lambda: serializers.FieldOfStudySerializer(models.FieldOfStudy.objects.all(), many=True).data
+            )
+            if field_of_study["id"] in field_of_study_ids
+        ]
+        tags = cached_data(
+            "tags", "list",
+            lambda: thesis_serializers.TagSerializer(thesis_models.Tag.objects.all(), many=True).data
+        )
+
+        supervisor = None
+        if user.is_supervisor:
+            supervisor = serializers.BootstrapSupervisorSerializer(
+                user, context={"fields_of_study": fields_of_study}
+            ).data
+
+        return Response({
+            "personal_data": serializers.PersonalDataSerializer(user).data,
+            "fields_of_study": fields_of_study,
+            "tags": tags,
+            "supervisor": supervisor,
+        }, status=status.HTTP_200_OK)
+
+
 class FieldOfStudyView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        fields_of_study = models.FieldOfStudy.objects.all()
-        serializer = serializers.FieldOfStudySerializer(fields_of_study, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return cached_json_response(
+            "fields_of_study", "all",
+            lambda: serializers.FieldOfStudySerializer(models.FieldOfStudy.objects.all(), many=True).data
+        )
 
     def post(self, request):
         serializer = serializers.FieldOfStudySerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump_version("fields_of_study")
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -181,12 +254,22 @@ class FieldOfStudyView(APIView):
         serializer = serializers.FieldOfStudySerializer(field_of_study, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            bump_version("fields_of_study")
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
         field_of_study = models.FieldOfStudy.objects.get(pk=pk)
-        field_of_study.delete()
+        with transaction.atomic():
+            revoke_tokens(field_of_study.systemuser_set.values_list('id', flat=True))
+            owner_ids = list(
+                thesis_models.Thesis.objects.filter(field_of_study=field_of_study)
+                .order_by().values_list('owner_id', flat=True).distinct()
+            )
+            # theses of the field of study are deleted with it
+            field_of_study.delete()
+            rebuild_capacity(models.SystemUser.objects.filter(id__in=owner_ids))
+        bump_version("fields_of_study")
         return Response(status=status.HTTP_204_NO_CONTENT)
     
 
@@ -195,7 +278,7 @@ class FieldOfStudyListView(APIView):
 
     def get(self, request):
         fields_of_study = models.FieldOfStudy.objects.filter(
-            systemuser=request.user
+            id__in=request.user.field_of_study_ids
         )
         data = serializers.FieldOfStudySerializer(fields_of_study, many=True).data
         for fos in data:
@@ -225,7 +308,7 @@ class DescriptionView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
-        serializer = serializers.DescriptionSerializer(request.user, data=request.data, partial=True)
+        serializer = serializers.DescriptionSerializer(stored_user(request.user), data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
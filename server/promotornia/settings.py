@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -54,7 +55,13 @@ REST_USE_JWT = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication'
+        if os.getenv('JWT_CLAIMS_AUTH', 'True') == 'True'
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'utils.metrics.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': int(os.getenv("ITEMS_PER_PAGE"))
@@ -66,7 +73,11 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Jak długo wersja tokenów użytkownika jest trzymana w cache (opóźnienie unieważnienia między procesami)
+TOKEN_VERSION_CACHE_TTL = int(os.getenv('TOKEN_VERSION_CACHE_TTL', '300'))
+
 MIDDLEWARE = [
+    'utils.metrics.request_metrics_middleware',
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     'django.middleware.security.SecurityMiddleware',
@@ -74,10 +85,16 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utils.db_router.primary_after_write_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Czasy zapytań (baza, uwierzytelnianie, parsowanie, serializacja, całość) w nagłówku Server-Timing odpowiedzi
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+# /metrics wymaga nagłówka "Authorization: Bearer <METRICS_TOKEN>"; bez ustawionego tokenu zwraca 404
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS').split(",")
 
 CORS_ALLOW_CREDENTIALS = True
@@ -113,9 +130,63 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # sprawdzanie połączenia przed wydaniem go z puli / ponownym użyciem
+        'CONN_HEALTH_CHECKS': os.getenv('DB_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
+# Pula połączeń psycopg, osobna w każdym procesie workera (wymaga psycopg[pool]).
+# Łącznie workery * DB_POOL_MAX_SIZE połączeń musi zmieścić się w max_connections bazy.
+# Z DB_POOL=False połączenia są trwałe przez DB_CONN_MAX_AGE sekund (0 - nowe na każde zapytanie HTTP).
+if os.getenv('DB_POOL', 'True') == 'True':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),  # sekundy oczekiwania na wolne połączenie
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '600')),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+
+# Replika do odczytu list i szczegółów prac oraz promotorów; bez POSTGRES_REPLICA_HOST wszystko idzie do 'default'.
+# Do testów wystarczy druga baza na tym samym serwerze (POSTGRES_REPLICA_DB, manage.py migrate --database=replica).
+if os.getenv('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('POSTGRES_REPLICA_DB', DATABASES['default']['NAME']),
+        'USER': os.getenv('POSTGRES_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('POSTGRES_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('POSTGRES_REPLICA_HOST'),
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['utils.db_router.ReplicaRouter']
+
+# Przez ile sekund po zapisie odczyty użytkownika idą do bazy głównej (powinno przekraczać opóźnienie replikacji).
+# Znacznik jest w cache, więc przy kilku workerach potrzebny jest wspólny cache (CACHE_DIR).
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory by default; set CACHE_DIR to share the cache between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'promotornia',
+    }
+}
+
+if os.getenv('CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR'),
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +207,8 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'accounts.SystemUser'
 
+AUTHENTICATION_BACKENDS = ['accounts.backends.OffloadedHashingBackend']
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -162,8 +235,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST')
 EMAIL_PORT = os.getenv('EMAIL_PORT')
-EMAIL_USE_TLS = False
-EMAIL_USE_SSL = True
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER') # Adres email w domenie AGH
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')  # Hasło do maila
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Outbox delivery (manage.py send_outbox)
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', '100'))
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', '5'))
+MAIL_RETRY_BACKOFF = int(os.getenv('MAIL_RETRY_BACKOFF', '60'))  # sekundy, podwajane przy każdej próbie
+
+# Hasła kont zakładanych przez dziekanat: 'unusable' (ustawiane przez link jednorazowy) albo 'hashed'
+PROVISIONING_PASSWORDS = os.getenv('PROVISIONING_PASSWORDS', 'unusable')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+
+# Haszowanie haseł przy logowaniu i ustawianiu hasła: liczba wątków (0 - w wątku zapytania),
+# maksymalna liczba oczekujących zadań (powyżej odpowiedź 503) i limit czasu oczekiwania w sekundach.
+# To tylko ograniczenie współbieżności - wątek obsługujący zapytanie czeka na wynik haszowania.
+PASSWORD_HASH_THREADS = int(os.getenv('PASSWORD_HASH_THREADS', str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
+# Import użytkowników z pliku (dean/users/import/)
+USER_IMPORT_CHUNK_SIZE = int(os.getenv('USER_IMPORT_CHUNK_SIZE', '500'))
+
+# Usuwanie użytkowników (dean/users/, manage.py run_deletion_jobs)
+USER_DELETE_CHUNK_SIZE = int(os.getenv('USER_DELETE_CHUNK_SIZE', '500'))
+# Zadanie "W trakcie" bez postępu przez tyle sekund jest przejmowane przez inny worker (np. po awarii).
+# Musi przekraczać czas usuwania jednej porcji USER_DELETE_CHUNK_SIZE.
+USER_DELETE_JOB_STALE_SECONDS = int(os.getenv('USER_DELETE_JOB_STALE_SECONDS', '600'))
@@ -0,0 +1,52 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from accounts import models as account_models
+
+from . import models
+
+TAKEN_STATUSES = ['Zarezerwowany', 'Student zaakceptowany', 'Zatwierdzony']
+
+
+def is_taken(thesis_status):
+    return thesis_status in TAKEN_STATUSES
+
+
+def taken_delta(old_status, new_status):
+    return int(is_taken(new_status)) - int(is_taken(old_status))
+
+
+def update_capacity(owner_id, theses=0, taken=0):
+    """
+    Shift the denormalized counters of a supervisor. Has to be called in the
+    same transaction as the write that changed their theses.
+    """
+    if not theses and not taken:
+        return
+    account_models.SystemUser.objects.filter(id=owner_id).update(
+        thesis_count=F('thesis_count') + theses,
+        taken_spots=F('taken_spots') + taken,
+    )
+
+
+def rebuild_capacity(users=None):
+    if users is None:
+        users = account_models.SystemUser.objects.all()
+
+    def counted(condition):
+        return Coalesce(
+            Subquery(
+                models.Thesis.objects.filter(condition, owner=OuterRef('pk'))
+                .order_by()
+                .values('owner')
+                .annotate(count=Count('id'))
+                .values('count'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        )
+
+    return users.update(
+        thesis_count=counted(Q()),
+        taken_spots=counted(Q(status__in=TAKEN_STATUSES)),
+    )
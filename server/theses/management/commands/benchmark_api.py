@@ -0,0 +1,261 @@
+import json
+import random
+import subprocess
+from collections import Counter, defaultdict
+from datetime import UTC, datetime
+from functools import partial
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import models as account_models
+from accounts.authentication import add_user_claims
+from theses import models
+from theses.management.commands.seed_data import SEED_PASSWORD, SEED_PREFIX, TOPICS
+from utils.bench import (
+    HttpClient,
+    asgi_request,
+    latency_summary,
+    run_async,
+    run_threaded,
+    wsgi_request,
+)
+
+# (endpoint, weight, request builder name) - a read-mostly enrollment mix
+MIX = [
+    ("thesis list", 18, 'thesis_list'),
+    ("thesis list page", 4, 'thesis_list_page'),
+    ("thesis list search", 8, 'thesis_list_search'),
+    ("thesis list tags", 6, 'thesis_list_tags'),
+    ("thesis", 15, 'thesis'),
+    ("supervisors list", 8, 'supervisors_list'),
+    ("supervisor", 6, 'supervisor'),
+    ("supervisor theses", 5, 'supervisor_theses'),
+    ("tags", 4, 'tags'),
+    ("bootstrap", 6, 'bootstrap'),
+    ("personal data", 3, 'personal_data'),
+    ("fields of study", 3, 'fields_of_study'),
+    ("thesis by producer", 4, 'thesis_by_producer'),
+    ("available students", 3, 'available_students'),
+    ("supervisor page", 3, 'supervisor_page'),
+    ("login", 1, 'login'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of the API endpoints against the dataset created by seed_data, "
+        "as seeded students and supervisors, and report throughput and p50/p95/p99 latency, "
+        "overall and per endpoint, as JSON. The wsgi and asgi entry points drive the "
+        "application in-process; http sends the requests to a running server at --url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once")
+        parser.add_argument('--entrypoint', choices=['wsgi', 'asgi', 'http'], default='wsgi')
+        parser.add_argument('--url', default='http://localhost:8000', help="Server used by --entrypoint http")
+        parser.add_argument('--users', type=int, default=500, help="Seeded students and supervisors to act as")
+        parser.add_argument('--warmup', type=int, default=200, help="Requests sent before measuring")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for a repeatable request sequence")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        if options['entrypoint'] != 'http' and settings.DEBUG:
+            self.stderr.write(self.style.WARNING("DEBUG is on; query logging will skew the results"))
+
+        self.random = random.Random(options['seed'])
+        self.load(options['users'])
+        send = self.sender(options)
+        weights = [weight for _, weight, _ in MIX]
+
+        def build(count):
+            return [
+                (label, *getattr(self, builder)())
+                for label, _, builder in self.random.choices(MIX, weights, k=count)
+            ]
+
+        if options['warmup']:
+            send(build(options['warmup']), options['concurrency'])
+        elapsed, results = send(build(options['requests']), options['concurrency'])
+
+        report = self.report(options, elapsed, results)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + "\n")
+            self.stderr.write(
+                f"{report['throughput_rps']} req/s, p50 {report['latency_ms']['p50']} ms, "
+                f"p99 {report['latency_ms']['p99']} ms, {report['errors']} errors; "
+                f"report written to {options['output']}"
+            )
+        else:
+            self.stdout.write(output)
+
+    def load(self, users):
+        """
+        Ids the request builders pick from, and tokens of a sample of seeded users.
+        """
+        seeded = account_models.SystemUser.objects.filter(email__startswith=SEED_PREFIX).order_by('id')
+        students = list(seeded.filter(is_student=True)[:users])
+        supervisors = list(seeded.filter(is_supervisor=True)[:max(users // 10, 1)])
+        if not students or not supervisors:
+            raise CommandError("No seeded dataset; run the seed_data command first")
+
+        theses = models.Thesis.objects.filter(owner__email__startswith=SEED_PREFIX).exclude(status="Ukryty")
+        self.thesis_ids = list(theses.values_list('id', flat=True))
+        self.supervisor_ids = list(seeded.filter(is_supervisor=True).values_list('id', flat=True))
+        self.producer_ids = list(theses.filter(producer__isnull=False).values_list('producer_id', flat=True))
+        self.tag_ids = list(models.Tag.objects.filter(name__startswith=SEED_PREFIX).values_list('id', flat=True))
+        owned = defaultdict(list)
+        for thesis_id, owner_id in models.Thesis.objects.filter(
+            owner__in=supervisors
+        ).values_list('id', 'owner_id'):
+            owned[owner_id].append(thesis_id)
+        self.owned_thesis_ids = owned
+        fields_of_study = account_models.FieldOfStudy.objects.filter(name__startswith=SEED_PREFIX).count()
+        # students list only the theses of their own field of study
+        per_field = len(self.thesis_ids) / max(fields_of_study, 1)
+        self.pages = max(1, min(5, int(per_field // settings.REST_FRAMEWORK['PAGE_SIZE'])))
+        self.dataset = {
+            'fields_of_study': fields_of_study,
+            'supervisors': len(self.supervisor_ids),
+            'students': seeded.filter(is_student=True).count(),
+            'theses': models.Thesis.objects.filter(owner__email__startswith=SEED_PREFIX).count(),
+            'tags': len(self.tag_ids),
+        }
+
+        def authorization(user):
+            return {'Authorization': "Bearer " + str(add_user_claims(RefreshToken.for_user(user), user).access_token)}
+
+        self.students = [(user, authorization(user)) for user in students]
+        self.supervisors = [(user, authorization(user)) for user in supervisors]
+
+    def sender(self, options):
+        """
+        Callable sending a list of (endpoint, method, path, query, headers, body)
+        requests `concurrency` at a time, returning the wall time and the results.
+        """
+        if options['entrypoint'] == 'wsgi':
+            application = get_wsgi_application()
+            return lambda requests, concurrency: run_threaded(
+                requests, concurrency, lambda: lambda request: wsgi_request(application, *request[1:])
+            )
+        if options['entrypoint'] == 'asgi':
+            application = get_asgi_application()
+            return lambda requests, concurrency: run_async(
+                requests, concurrency, lambda request: asgi_request(application, *request[1:])
+            )
+        url = options['url']
+        return lambda requests, concurrency: run_threaded(
+            requests, concurrency, lambda: partial(self.send_http, HttpClient(url))
+        )
+
+    def send_http(self, client, request):
+        return client.request(*request[1:])
+
+    def report(self, options, elapsed, results):
+        by_endpoint = defaultdict(list)
+        for request, code, latency in results:
+            by_endpoint[request[0]].append((code, latency))
+        errors = sum(not 200 <= code < 400 for _, code, _ in results)
+
+        return {
+            'timestamp': datetime.now(UTC).isoformat(timespec='seconds'),
+            'revision': self.revision(),
+            'entrypoint': options['entrypoint'],
+            'concurrency': options['concurrency'],
+            'seed': options['seed'],
+            'dataset': self.dataset,
+            'requests': len(results),
+            'duration_s': round(elapsed, 3),
+            'throughput_rps': round(len(results) / elapsed, 1),
+            'errors': errors,
+            'latency_ms': latency_summary([latency for _, _, latency in results]),
+            'endpoints': {
+                label: {
+                    'requests': len(calls),
+                    'errors': sum(not 200 <= code < 400 for code, _ in calls),
+                    'status': {str(code): count for code, count in sorted(Counter(code for code, _ in calls).items())},
+                    'latency_ms': latency_summary([latency for _, latency in calls]),
+                }
+                for label, calls in sorted(by_endpoint.items())
+            },
+        }
+
+    def revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    # Request builders: (method, path, query, headers, body)
+
+    def student(self):
+        return self.random.choice(self.students)
+
+    def supervisor_user(self):
+        return self.random.choice(self.supervisors)
+
+    def thesis_list(self):
+        return 'GET', "/api/thesis/list/", "cursor=", self.student()[1], b''
+
+    def thesis_list_page(self):
+        return 'GET', "/api/thesis/list/", f"page={self.random.randint(1, self.pages)}", self.student()[1], b''
+
+    def thesis_list_search(self):
+        word = self.random.choice(TOPICS).split()[-1]
+        return 'GET', "/api/thesis/list/", urlencode({'cursor': '', 'search': word}), self.student()[1], b''
+
+    def thesis_list_tags(self):
+        tags = ",".join(map(str, self.random.sample(self.tag_ids, min(len(self.tag_ids), 2))))
+        return 'GET', "/api/thesis/list/", urlencode({'cursor': '', 'tags': tags}), self.student()[1], b''
+
+    def thesis(self):
+        return 'GET', f"/api/thesis/{self.random.choice(self.thesis_ids)}/", "", self.student()[1], b''
+
+    def supervisors_list(self):
+        return 'GET', "/api/supervisors/list/", "cursor=", self.student()[1], b''
+
+    def supervisor(self):
+        return 'GET', f"/api/supervisors/{self.random.choice(self.supervisor_ids)}/", "", self.student()[1], b''
+
+    def supervisor_theses(self):
+        return 'GET', f"/api/thesis/supervisor/{self.random.choice(self.supervisor_ids)}/", "", self.student()[1], b''
+
+    def tags(self):
+        return 'GET', "/api/all_supervisor_interest_tags/", "", self.student()[1], b''
+
+    def bootstrap(self):
+        headers = self.random.choice([self.student, self.supervisor_user])()[1]
+        return 'GET', "/api/user/bootstrap/", "", headers, b''
+
+    def personal_data(self):
+        return 'GET', "/api/user/personal_data/", "", self.student()[1], b''
+
+    def fields_of_study(self):
+        return 'GET', "/api/user/fields_of_study/", "", self.student()[1], b''
+
+    def thesis_by_producer(self):
+        # students look up their own thesis, so only producers are asked for
+        producer_id = self.random.choice(self.producer_ids or [self.student()[0].id])
+        return 'GET', f"/api/thesis/producer/{producer_id}/", "", self.student()[1], b''
+
+    def available_students(self):
+        user, headers = self.supervisor_user()
+        thesis_ids = self.owned_thesis_ids.get(user.id) or self.thesis_ids
+        return 'GET', "/api/students/available/", f"thesis_id={self.random.choice(thesis_ids)}", headers, b''
+
+    def supervisor_page(self):
+        return 'GET', "/api/user/supervisor/my_page/", "", self.supervisor_user()[1], b''
+
+    def login(self):
+        body = json.dumps({'email': self.student()[0].email, 'password': SEED_PASSWORD}).encode()
+        return 'POST', "/api/user/login/", "", {'Content-Type': 'application/json'}, body
@@ -0,0 +1,129 @@
+import uuid
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import models as account_models
+from accounts.authentication import add_user_claims
+from theses import models
+from utils.bench import (
+    asgi_request,
+    latency_summary,
+    run_async,
+    run_threaded,
+    wsgi_request,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/second and latency of the read endpoints under the ASGI and WSGI "
+        "entry points, driving both applications in-process against the configured database. "
+        "The client shares the process, so compare the entry points with each other rather "
+        "than reading the numbers as server capacity. Test data is removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and entry point")
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once")
+        parser.add_argument('--theses', type=int, default=200)
+        parser.add_argument('--supervisors', type=int, default=20)
+        parser.add_argument('--entrypoints', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING("DEBUG is on; query logging will skew the results"))
+
+        prefix = uuid.uuid4().hex[:8]
+        field_of_study, supervisors, student, theses, tags = self.seed(prefix, options)
+        token = "Bearer " + str(add_user_claims(RefreshToken.for_user(student), student).access_token)
+        endpoints = [
+            ("thesis list", "/api/thesis/list/", "cursor="),
+            ("thesis", f"/api/thesis/{theses[0].id}/", ""),
+            ("supervisor list", "/api/supervisors/list/", "cursor="),
+            ("supervisor", f"/api/supervisors/{supervisors[0].id}/", ""),
+            ("tags", "/api/all_supervisor_interest_tags/", ""),
+        ]
+
+        try:
+            self.stdout.write(
+                f"{'entry point':<12} {'endpoint':<16} {'req/s':>9} {'p50 [ms]':>9} {'p99 [ms]':>9} {'errors':>7}"
+            )
+            for entrypoint in options['entrypoints']:
+                run = self.run_wsgi if entrypoint == 'wsgi' else self.run_asgi
+                for label, path, query in endpoints:
+                    # warm up connections, caches and imports
+                    run(path, query, token, options['concurrency'], options['concurrency'])
+                    elapsed, results = run(path, query, token, options['requests'], options['concurrency'])
+                    self.report(entrypoint, label, elapsed, results)
+        finally:
+            models.Thesis.objects.filter(id__in=[thesis.id for thesis in theses]).delete()
+            models.Tag.objects.filter(id__in=[tag.id for tag in tags]).delete()
+            account_models.SystemUser.objects.filter(
+                id__in=[student.id] + [supervisor.id for supervisor in supervisors]
+            ).delete()
+            field_of_study.delete()
+
+    def report(self, entrypoint, label, elapsed, results):
+        summary = latency_summary([latency for _, _, latency in results])
+        errors = sum(code != 200 for _, code, _ in results)
+        self.stdout.write(
+            f"{entrypoint:<12} {label:<16} {len(results) / elapsed:>9.1f} "
+            f"{summary['p50']:>9.2f} {summary['p99']:>9.2f} {errors:>7}"
+        )
+
+    def run_wsgi(self, path, query, token, count, concurrency):
+        application = get_wsgi_application()
+        headers = {'Authorization': token}
+        return run_threaded(
+            range(count), concurrency,
+            lambda: lambda _: wsgi_request(application, 'GET', path, query, headers)
+        )
+
+    def run_asgi(self, path, query, token, count, concurrency):
+        application = get_asgi_application()
+        headers = {'Authorization': token}
+        return run_async(
+            range(count), concurrency,
+            lambda _: asgi_request(application, 'GET', path, query, headers)
+        )
+
+    def seed(self, prefix, options):
+        field_of_study = account_models.FieldOfStudy.objects.create(name=f"bench-{prefix}")
+        supervisors = account_models.SystemUser.objects.bulk_create(
+            account_models.SystemUser(
+                email=f"bench-{prefix}-{i}@agh.edu.pl",
+                first_name="Jan",
+                last_name=f"Kowalski {i}",
+                is_supervisor=True,
+                total_spots=5,
+            )
+            for i in range(options['supervisors'])
+        )
+        student = account_models.SystemUser.objects.create(
+            email=f"bench-{prefix}@student.agh.edu.pl", is_student=True
+        )
+        Through = account_models.SystemUser.field_of_study.through
+        Through.objects.bulk_create(
+            Through(systemuser_id=user.id, fieldofstudy_id=field_of_study.id)
+            for user in [*supervisors, student]
+        )
+        tags = models.Tag.objects.bulk_create(models.Tag(name=f"bench-{prefix}-{i}") for i in range(10))
+        theses = models.Thesis.objects.bulk_create(
+            models.Thesis(
+                name=f"bench-{prefix}-{i}",
+                owner=supervisors[i % len(supervisors)],
+                field_of_study=field_of_study,
+                status="Dostępny",
+                tag_ids=[tags[i % len(tags)].id],
+            )
+            for i in range(options['theses'])
+        )
+        ThesisTags = models.Thesis.tags.through
+        ThesisTags.objects.bulk_create(
+            ThesisTags(thesis_id=thesis.id, tag_id=thesis.tag_ids[0]) for thesis in theses
+        )
+        return field_of_study, supervisors, student, theses, tags
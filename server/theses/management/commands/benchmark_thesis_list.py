@@ -0,0 +1,87 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from accounts import models as account_models
+from theses import models, serializers
+from theses.projections import thesis_list_items, thesis_list_rows
+
+DISCARDED_FIELDS = ["description", "prerequisites", "producer"]
+
+
+class Command(BaseCommand):
+    help = "Compare ThesisSerializer with the list projection on synthetic theses (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[20, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--tags', type=int, default=3, help="Tags per thesis")
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['rows'])
+        with transaction.atomic():
+            ids = self.seed(sizes[-1], options['tags'])
+            self.stdout.write(f"{'rows':>6} {'serializer [ms]':>16} {'projection [ms]':>16} {'speedup':>8}")
+            for size in sizes:
+                queryset = models.Thesis.objects.filter(id__in=ids[:size]).order_by('id')
+                serialized, serializer_time = self.measure(options['repeat'], lambda queryset=queryset: serializers.ThesisSerializer(
+                    queryset.with_relations(producer=False),
+                    many=True,
+                    context={"discarded_fields": DISCARDED_FIELDS}
+                ).data)
+                projected, projection_time = self.measure(options['repeat'], lambda queryset=queryset: thesis_list_items(
+                    thesis_list_rows(queryset)
+                ))
+                if JSONRenderer().render(serialized) != JSONRenderer().render(projected):
+                    self.stderr.write(self.style.ERROR(f"Outputs differ for {size} rows"))
+                self.stdout.write(
+                    f"{size:>6} {serializer_time * 1000:>16.2f} {projection_time * 1000:>16.2f} "
+                    f"{serializer_time / projection_time:>7.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, repeat, build):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = build()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def seed(self, count, tags_per_thesis):
+        prefix = uuid.uuid4().hex[:8]
+        field_of_study = account_models.FieldOfStudy.objects.create(name=f"bench-{prefix}")
+        owner = account_models.SystemUser.objects.create(
+            email=f"bench-{prefix}@agh.edu.pl",
+            first_name="Jan",
+            last_name="Kowalski",
+            is_supervisor=True,
+        )
+        tags = models.Tag.objects.bulk_create(
+            models.Tag(name=f"bench-{prefix}-{i}") for i in range(max(tags_per_thesis, 1) * 2)
+        )
+        tag_ids = [
+            sorted({tags[(i + j) % len(tags)].id for j in range(tags_per_thesis)})
+            for i in range(count)
+        ]
+        theses = models.Thesis.objects.bulk_create(
+            models.Thesis(
+                name=f"bench-{prefix}-{i}",
+                owner=owner,
+                field_of_study=field_of_study,
+                status="Dostępny",
+                tag_ids=tag_ids[i],
+            )
+            for i in range(count)
+        )
+        Through = models.Thesis.tags.through
+        Through.objects.bulk_create(
+            Through(thesis_id=thesis.id, tag_id=tag_id)
+            for thesis, thesis_tag_ids in zip(theses, tag_ids)
+            for tag_id in thesis_tag_ids
+        )
+        return [thesis.id for thesis in theses]
@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import models as account_models
+from accounts.authentication import add_user_claims
+from theses import models
+from utils.db_router import REPLICA, replica_configured, unpin
+
+
+class Command(BaseCommand):
+    help = (
+        "Check read routing against a replica that does not replicate, i.e. a second, "
+        "migrated but empty database (POSTGRES_REPLICA_DB). Rows written by the command exist "
+        "only on the primary, so a read answered with 404 was served by the replica. "
+        "Test data is removed afterwards."
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError("No replica configured; set POSTGRES_REPLICA_HOST")
+        primary, replica = settings.DATABASES['default'], settings.DATABASES[REPLICA]
+        if (primary['HOST'], primary['PORT'], primary['NAME']) == (replica['HOST'], replica['PORT'], replica['NAME']):
+            raise CommandError("The replica points at the primary database; routing cannot be observed")
+
+        prefix = uuid.uuid4().hex[:8]
+        field_of_study = account_models.FieldOfStudy.objects.create(name=f"replica-{prefix}")
+        supervisor = account_models.SystemUser.objects.create(
+            email=f"replica-{prefix}@agh.edu.pl", is_supervisor=True, total_spots=1
+        )
+        student = account_models.SystemUser.objects.create(
+            email=f"replica-{prefix}@student.agh.edu.pl", is_student=True
+        )
+        student.field_of_study.add(field_of_study)
+        thesis = models.Thesis.objects.create(
+            name=f"replica-{prefix}", owner=supervisor, field_of_study=field_of_study, status="Dostępny"
+        )
+        account_models.SystemUser.objects.filter(id=supervisor.id).update(thesis_count=1)
+        path = f"/api/thesis/{thesis.id}/"
+
+        try:
+            errors = []
+            errors += self.expect("Student before writing", self.read(student, path), 404)
+
+            response = Client().put(
+                f"/api/theses/{thesis.id}/status/edit/",
+                {"status": "Zarezerwowany"},
+                content_type="application/json",
+                headers={"Authorization": self.token(student)},
+            )
+            if response.status_code != 200:
+                raise CommandError(f"Reservation failed with {response.status_code}: {response.content!r}")
+
+            errors += self.expect("Student right after writing", self.read(student, path), 200)
+            errors += self.expect("Another user", self.read(supervisor, path), 404)
+            unpin(student.pk)
+            errors += self.expect("Student after the sticky window", self.read(student, path), 404)
+        finally:
+            models.Thesis.objects.filter(id=thesis.id).delete()
+            account_models.SystemUser.objects.filter(id__in=[supervisor.id, student.id]).delete()
+            field_of_study.delete()
+
+        if errors:
+            raise CommandError("\n".join(errors))
+        self.stdout.write(self.style.SUCCESS("Reads are routed to the replica, writers stick to the primary"))
+
+    def token(self, user):
+        return "Bearer " + str(add_user_claims(RefreshToken.for_user(user), user).access_token)
+
+    def read(self, user, path):
+        """
+        Status codes of the same read through the WSGI and the ASGI request handler.
+        """
+        headers = {"Authorization": self.token(user)}
+        wsgi = Client().get(path, headers=headers).status_code
+        asgi = asyncio.run(AsyncClient().get(path, headers=headers)).status_code
+        return wsgi, asgi
+
+    def expect(self, label, codes, expected):
+        self.stdout.write(f"{label}: WSGI {codes[0]}, ASGI {codes[1]} (expected {expected})")
+        if codes != (expected, expected):
+            return [f"{label}: got {codes}, expected {expected}"]
+        return []
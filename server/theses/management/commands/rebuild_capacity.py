@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from theses.capacity import rebuild_capacity
+
+
+class Command(BaseCommand):
+    help = "Recompute thesis_count and taken_spots of every user from the theses table"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_capacity()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt capacity counters of {updated} users"))
@@ -0,0 +1,222 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts import models as account_models
+from accounts.deletion import delete_users
+from theses import models
+from theses.capacity import TAKEN_STATUSES, rebuild_capacity
+from utils.cache import bump_version
+
+SEED_PREFIX = "seed-"
+SEED_PASSWORD = "seed-password"
+
+FIRST_NAMES = [
+    "Anna", "Piotr", "Katarzyna", "Tomasz", "Magdalena", "Paweł", "Agnieszka", "Michał", "Joanna", "Krzysztof",
+    "Ewa", "Marcin", "Aleksandra", "Jakub", "Zofia", "Łukasz", "Małgorzata", "Wojciech", "Natalia", "Grzegorz",
+]
+LAST_NAMES = [
+    "Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski", "Zieliński",
+    "Szymański", "Woźniak", "Dąbrowski", "Kozłowski", "Jankowski", "Mazur", "Kwiatkowski", "Krawczyk",
+    "Piotrowski", "Grabowski", "Nowakowski", "Pawłowski", "Michalski", "Król", "Wieczorek", "Jabłoński",
+]
+TITLES = ["dr", "dr inż.", "dr hab.", "dr hab. inż.", "prof. dr hab."]
+FIELDS_OF_STUDY = [
+    "Informatyka", "Automatyka i Robotyka", "Elektronika", "Telekomunikacja", "Matematyka", "Fizyka Techniczna",
+    "Inżynieria Materiałowa", "Górnictwo i Geologia", "Geoinformatyka", "Inżynieria Biomedyczna",
+    "Mechatronika", "Energetyka", "Zarządzanie i Inżynieria Produkcji", "Ekonomia", "Informatyka Stosowana",
+]
+TOPICS = [
+    "sieci neuronowych", "systemów rozproszonych", "baz danych", "uczenia maszynowego", "przetwarzania obrazów",
+    "kryptografii", "systemów wbudowanych", "analizy danych", "robotyki mobilnej", "sieci komputerowych",
+    "przetwarzania języka naturalnego", "symulacji numerycznych", "internetu rzeczy", "grafiki komputerowej",
+    "bezpieczeństwa aplikacji", "optymalizacji kombinatorycznej", "systemów czasu rzeczywistego",
+]
+KINDS = [
+    "Zastosowanie", "Analiza", "Projekt i implementacja", "Porównanie metod", "Badanie wydajności",
+    "Model", "Optymalizacja", "Wizualizacja",
+]
+# status distribution of theses during enrollment
+STATUS_WEIGHTS = {
+    "Dostępny": 60, "Ukryty": 10, "Zarezerwowany": 15, "Student zaakceptowany": 8, "Zatwierdzony": 7,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset for benchmarks: fields of study, supervisors, students, tags and "
+        "theses (with tags and reservations), inserted with bulk_create. Seeded users have e-mails "
+        f"starting with '{SEED_PREFIX}' and share the password '{SEED_PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fields-of-study', type=int, default=10)
+        parser.add_argument('--supervisors', type=int, default=2000)
+        parser.add_argument('--students', type=int, default=30000)
+        parser.add_argument('--theses', type=int, default=20000)
+        parser.add_argument('--tags', type=int, default=300)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for a reproducible dataset")
+        parser.add_argument('--clear', action='store_true', help="Remove a previously seeded dataset first")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+        elif account_models.SystemUser.objects.filter(email__startswith=SEED_PREFIX).exists():
+            self.stderr.write(self.style.WARNING("A seeded dataset already exists; use --clear to replace it"))
+            return
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        start = time.perf_counter()
+        with transaction.atomic():
+            fields_of_study = self.seed_fields_of_study(options['fields_of_study'])
+            tags = self.seed_tags(options['tags'])
+            password = make_password(SEED_PASSWORD)
+            supervisors = self.seed_supervisors(options['supervisors'], fields_of_study, password)
+            students = self.seed_students(options['students'], fields_of_study, password)
+            theses = self.seed_theses(options['theses'], supervisors, students, tags)
+            rebuild_capacity(account_models.SystemUser.objects.filter(id__in=[user.id for user, _ in supervisors]))
+            bump_version("fields_of_study")
+            bump_version("tags")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(fields_of_study)} fields of study, {len(supervisors)} supervisors, "
+            f"{len(students)} students, {len(tags)} tags and {theses} theses "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def clear(self):
+        user_ids = list(
+            account_models.SystemUser.objects.filter(email__startswith=SEED_PREFIX).values_list('id', flat=True)
+        )
+        # theses cascade from their supervisors
+        deleted = delete_users(user_ids)
+        with transaction.atomic():
+            models.Tag.objects.filter(name__startswith=SEED_PREFIX).delete()
+            account_models.FieldOfStudy.objects.filter(name__startswith=SEED_PREFIX).delete()
+            bump_version("fields_of_study")
+            bump_version("tags")
+        self.stdout.write(f"Removed {deleted} seeded users with their theses")
+
+    def seed_fields_of_study(self, count):
+        return account_models.FieldOfStudy.objects.bulk_create(
+            account_models.FieldOfStudy(name=f"{SEED_PREFIX}{FIELDS_OF_STUDY[i % len(FIELDS_OF_STUDY)]} {i}")
+            for i in range(count)
+        )
+
+    def seed_tags(self, count):
+        return models.Tag.objects.bulk_create(
+            (models.Tag(name=f"{SEED_PREFIX}{TOPICS[i % len(TOPICS)]} {i}") for i in range(count)),
+            batch_size=self.batch_size,
+        )
+
+    def person(self):
+        return self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+
+    def seed_supervisors(self, count, fields_of_study, password):
+        """
+        Supervisors with one or two fields of study, as (user, field of study ids) pairs.
+        """
+        users = []
+        for i in range(count):
+            first_name, last_name = self.person()
+            users.append(account_models.SystemUser(
+                email=f"{SEED_PREFIX}{i}@agh.edu.pl",
+                first_name=first_name,
+                last_name=last_name,
+                title=self.random.choice(TITLES),
+                description=f"Zajmuję się zagadnieniami {self.random.choice(TOPICS)}.",
+                is_supervisor=True,
+                total_spots=self.random.randint(3, 12),
+                password=password,
+            ))
+        users = account_models.SystemUser.objects.bulk_create(users, batch_size=self.batch_size)
+        assigned = []
+        for user in users:
+            chosen = self.random.sample(fields_of_study, min(len(fields_of_study), self.random.randint(1, 2)))
+            assigned.append((user, [field.id for field in chosen]))
+        self.link_fields_of_study(assigned)
+        return assigned
+
+    def seed_students(self, count, fields_of_study, password):
+        """
+        Students with one field of study, as (user, field of study ids) pairs.
+        """
+        users = []
+        for i in range(count):
+            first_name, last_name = self.person()
+            users.append(account_models.SystemUser(
+                email=f"{SEED_PREFIX}{i}@student.agh.edu.pl",
+                first_name=first_name,
+                last_name=last_name,
+                is_student=True,
+                password=password,
+            ))
+        users = account_models.SystemUser.objects.bulk_create(users, batch_size=self.batch_size)
+        assigned = [(user, [self.random.choice(fields_of_study).id]) for user in users]
+        self.link_fields_of_study(assigned)
+        return assigned
+
+    def link_fields_of_study(self, assigned):
+        Through = account_models.SystemUser.field_of_study.through
+        Through.objects.bulk_create(
+            (
+                Through(systemuser_id=user.id, fieldofstudy_id=field_of_study_id)
+                for user, field_of_study_ids in assigned
+                for field_of_study_id in field_of_study_ids
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def seed_theses(self, count, supervisors, students, tags):
+        """
+        Theses in one of their supervisor's fields of study. Reserved theses get
+        a student of that field who has no other thesis, within the supervisor's spots.
+        """
+        free_students = {}
+        for student, (field_of_study_id,) in students:
+            free_students.setdefault(field_of_study_id, []).append(student.id)
+        for ids in free_students.values():
+            self.random.shuffle(ids)
+        taken = {}
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+
+        theses, tag_ids = [], []
+        for i in range(count):
+            owner, field_of_study_ids = supervisors[i % len(supervisors)]
+            field_of_study_id = self.random.choice(field_of_study_ids)
+            status = self.random.choices(statuses, weights)[0]
+            producer_id = None
+            if status in TAKEN_STATUSES:
+                if taken.get(owner.id, 0) < owner.total_spots and free_students.get(field_of_study_id):
+                    producer_id = free_students[field_of_study_id].pop()
+                    taken[owner.id] = taken.get(owner.id, 0) + 1
+                else:
+                    status = "Dostępny"
+            chosen = self.random.sample(tags, min(len(tags), self.random.randint(1, 4)))
+            thesis_tag_ids = sorted(tag.id for tag in chosen)
+            tag_ids.append(thesis_tag_ids)
+            theses.append(models.Thesis(
+                name=f"{self.random.choice(KINDS)} {self.random.choice(TOPICS)} ({SEED_PREFIX}{i})",
+                description=f"Praca dotyczy {self.random.choice(TOPICS)} oraz {self.random.choice(TOPICS)}.",
+                prerequisites="Podstawy programowania",
+                owner_id=owner.id,
+                producer_id=producer_id,
+                field_of_study_id=field_of_study_id,
+                status=status,
+                tag_ids=thesis_tag_ids,
+            ))
+
+        ThesisTags = models.Thesis.tags.through
+        for start in range(0, count, self.batch_size):
+            batch = models.Thesis.objects.bulk_create(theses[start:start + self.batch_size])
+            ThesisTags.objects.bulk_create(
+                ThesisTags(thesis_id=thesis.id, tag_id=tag_id)
+                for thesis, thesis_tag_ids in zip(batch, tag_ids[start:start + self.batch_size])
+                for tag_id in thesis_tag_ids
+            )
+        return count
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 10:45
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+import accounts.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('accounts', '0004_search_indexes'),
+        ('theses', '0002_alter_tag_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='thesis',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector(accounts.search.Unaccent('name'), config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector(accounts.search.Unaccent('description'), config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector(accounts.search.Unaccent('prerequisites'), config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='thesis',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='thesis_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thesis',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(accounts.search.Unaccent(django.db.models.functions.text.Lower(models.F('name'))), name='gin_trgm_ops'), name='thesis_name_trgm_idx'),
+        ),
+    )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 11:20
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = (
+        ('theses', '0004_updated_at'),
+    )
+
+    operations = (
+        migrations.AddField(
+            model_name='thesis',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE theses_thesis AS thesis
+                SET tag_ids = tagged.tag_ids
+                FROM (
+                    SELECT thesis_id, array_agg(tag_id ORDER BY tag_id) AS tag_ids
+                    FROM theses_thesis_tags
+                    GROUP BY thesis_id
+                ) AS tagged
+                WHERE tagged.thesis_id = thesis.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='thesis',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='thesis_tag_ids_idx'),
+        ),
+    )
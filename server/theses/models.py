@@ -1,14 +1,28 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from accounts import models as account_models
+from accounts.search import normalized
 from django.utils import timezone
 
+from .search import thesis_search_vector
+
 class Tag(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']
 
+class ThesisQuerySet(models.QuerySet):
+    def with_relations(self, producer=True):
+        related = ['owner', 'field_of_study']
+        if producer:
+            related.append('producer')
+        return self.select_related(*related).prefetch_related('tags')
+
 class Thesis(models.Model):
     name = models.CharField(
         max_length=255,
@@ -46,5 +60,24 @@ class Thesis(models.Model):
         null=True,
     )
     tags = models.ManyToManyField(Tag)
+    tag_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
     date_of_creation = models.DateTimeField(default=timezone.now)
     status = models.CharField(default='Ukryty', max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ThesisQuerySet.as_manager()
+    search_vector = models.GeneratedField(
+        expression=thesis_search_vector(),
+        output_field=SearchVectorField(),
+        db_persist=True
+    )
+
+    class Meta:
+        indexes = (
+            GinIndex(fields=['search_vector'], name='thesis_search_vector_idx'),
+            GinIndex(fields=['tag_ids'], name='thesis_tag_ids_idx'),
+            GinIndex(
+                OpClass(normalized('name'), name='gin_trgm_ops'),
+                name='thesis_name_trgm_idx'
+            ),
+        )
@@ -0,0 +1,185 @@
+import base64
+import json
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from utils.async_views import gather_queries
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    Passing `cursor` (empty for the first page) switches to keyset mode: pages
+    are positioned by the ordering value and `id` of the boundary row, so the
+    cost of a page does not depend on its depth. The total is only returned on
+    request, either exact (`count=exact`) or planner-estimated (`count=estimate`).
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    tiebreaker = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+
+        page = self.start_keyset(queryset, request)
+        self.count = self.get_count(queryset, request.query_params.get(self.count_query_param))
+        return self.finish_keyset(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async paginate_queryset. In keyset mode the page and the requested total
+        are independent, so they are fetched concurrently.
+        """
+        if self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return await sync_to_async(super().paginate_queryset)(queryset, request, view)
+
+        page = self.start_keyset(queryset, request)
+        mode = request.query_params.get(self.count_query_param)
+        if mode not in ('exact', 'estimate'):
+            self.count = None
+            rows = await sync_to_async(list)(page)
+        else:
+            rows, self.count = await gather_queries(
+                lambda: list(page), lambda: self.get_count(queryset, mode)
+            )
+        return self.finish_keyset(rows)
+
+    def start_keyset(self, queryset, request):
+        """
+        Ordered and positioned queryset of the requested keyset page, with one
+        extra row telling whether there is more.
+        """
+        self.keyset = True
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        field, descending = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        reverse = cursor is not None and cursor['reverse']
+
+        queryset = queryset.order_by(*self.get_order_by(field, descending != reverse))
+        if cursor is not None:
+            queryset = queryset.filter(self.get_position_filter(field, descending != reverse, cursor))
+
+        self.field = field
+        self.cursor = cursor
+        return queryset[:self.page_size + 1]
+
+    def finish_keyset(self, rows):
+        reverse = self.cursor is not None and self.cursor['reverse']
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else self.cursor is not None
+        self.has_previous = self.cursor is not None if not reverse else has_more
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.rows:
+            return None
+        return self.build_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.rows:
+            return None
+        return self.build_link(self.rows[0], reverse=True)
+
+    def build_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def get_ordering(self, queryset):
+        order_by = [o for o in queryset.query.order_by if isinstance(o, str)]
+        if not order_by:
+            return self.tiebreaker, False
+        field = order_by[0]
+        return field.lstrip('-'), field.startswith('-')
+
+    def get_order_by(self, field, descending):
+        desc = '-' if descending else ''
+        if field == self.tiebreaker:
+            return [f'{desc}{field}']
+        return [f'{desc}{field}', f'{desc}{self.tiebreaker}']
+
+    def get_position_filter(self, field, descending, cursor):
+        lookup = 'lt' if descending else 'gt'
+        tiebreak = Q(**{f'{self.tiebreaker}__{lookup}': cursor['id']})
+        if field == self.tiebreaker:
+            return tiebreak
+        return (
+            Q(**{f'{field}__{lookup}': cursor['value']}) |
+            (Q(**{field: cursor['value']}) & tiebreak)
+        )
+
+    def encode_cursor(self, row, reverse):
+        read = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+        value = read(self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = {'value': value, 'id': read(self.tiebreaker), 'reverse': reverse}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, raw):
+        if not raw:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(raw.encode()))
+            cursor['id'] = int(cursor['id'])
+            cursor['reverse'] = bool(cursor.get('reverse', False))
+            cursor['value']
+        except (ValueError, TypeError, KeyError):
+            raise NotFound("Niepoprawny kursor stronicowania")
+        return cursor
+
+    def get_count(self, queryset, mode):
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return self.estimate_count(queryset)
+        return None
+
+    def estimate_count(self, queryset):
+        """
+        Row estimate taken from the PostgreSQL query plan instead of COUNT(*).
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.count()
+        sql, params = queryset.order_by().values(self.tiebreaker).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,66 @@
+from django.contrib.postgres.aggregates import JSONBAgg
+from django.db.models import JSONField, OuterRef, Subquery
+from django.db.models.functions import JSONObject
+from rest_framework.fields import DateTimeField
+
+from . import models
+
+THESIS_LIST_FIELDS = (
+    'id', 'name', 'date_of_creation', 'status',
+    'owner__id', 'owner__email', 'owner__first_name', 'owner__last_name', 'owner__title',
+    'field_of_study__id', 'field_of_study__name',
+)
+
+_date_field = DateTimeField()
+
+
+def tags_subquery():
+    tagged = models.Thesis.tags.through.objects.filter(
+        thesis_id=OuterRef('pk')
+    ).order_by().values('thesis_id').annotate(
+        tag_list=JSONBAgg(JSONObject(id='tag_id', name='tag__name'), order_by='tag__name')
+    ).values('tag_list')
+    return Subquery(tagged, output_field=JSONField())
+
+
+def thesis_list_rows(queryset):
+    """
+    Project a thesis queryset onto the columns shown in thesis lists, with the
+    tags aggregated in SQL. Annotations (e.g. the ordering key) are kept so the
+    rows can still be paginated by keyset.
+    """
+    return queryset.prefetch_related(None).annotate(
+        tag_list=tags_subquery()
+    ).values(*THESIS_LIST_FIELDS, *queryset.query.annotations, 'tag_list')
+
+
+def thesis_list_item(row):
+    """
+    Build the same dict ThesisSerializer produces with description, prerequisites
+    and producer discarded.
+    """
+    field_of_study = None
+    if row['field_of_study__id'] is not None:
+        field_of_study = {
+            'id': row['field_of_study__id'],
+            'name': row['field_of_study__name'],
+        }
+    return {
+        'id': row['id'],
+        'tags': row['tag_list'] or [],
+        'owner': {
+            'id': row['owner__id'],
+            'email': row['owner__email'],
+            'first_name': row['owner__first_name'],
+            'last_name': row['owner__last_name'],
+            'title': row['owner__title'],
+        },
+        'field_of_study': field_of_study,
+        'name': row['name'],
+        'date_of_creation': _date_field.to_representation(row['date_of_creation']),
+        'status': row['status'],
+    }
+
+
+def thesis_list_items(rows):
+    return [thesis_list_item(row) for row in rows]
@@ -0,0 +1,77 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
+from accounts import models as account_models
+from accounts.search import Unaccent, full_name, normalized, normalized_phrase
+
+SEARCH_CONFIG = 'simple'
+
+
+def keyset_rank(expression):
+    """
+    Rank as float8. The similarity and rank functions return float4, which
+    does not survive the round trip through a JSON keyset cursor, so the next
+    page would not start exactly after the boundary row.
+    """
+    return Cast(expression, FloatField())
+
+
+def thesis_search_vector():
+    return (
+        SearchVector(Unaccent('name'), weight='A', config=SEARCH_CONFIG) +
+        SearchVector(Unaccent('description'), weight='B', config=SEARCH_CONFIG) +
+        SearchVector(Unaccent('prerequisites'), weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def search_supervisors(queryset, phrase):
+    phrase_norm = normalized_phrase(phrase)
+    return queryset.annotate(
+        search_name=normalized(full_name()),
+    ).filter(
+        search_name__contains=phrase_norm
+    ).annotate(
+        rank=keyset_rank(TrigramSimilarity(F('search_name'), phrase_norm))
+    )
+
+
+def search_students(queryset, prefix):
+    """
+    Typeahead match on the beginning of the e-mail, the last name or the full
+    name, served by the prefix indexes on students.
+    """
+    prefix_norm = normalized_phrase(prefix)
+    return queryset.annotate(
+        search_email=normalized('email'),
+        search_last_name=normalized('last_name'),
+        search_name=normalized(full_name()),
+    ).filter(
+        Q(search_email__startswith=prefix_norm) |
+        Q(search_last_name__startswith=prefix_norm) |
+        Q(search_name__startswith=prefix_norm)
+    )
+
+
+def search_theses(queryset, phrase):
+    phrase_norm = normalized_phrase(phrase)
+    query = SearchQuery(Unaccent(Value(phrase)), config=SEARCH_CONFIG, search_type='websearch')
+    owners = search_supervisors(account_models.SystemUser.objects.all(), phrase).values('id')
+    return queryset.annotate(
+        search_name=normalized('name'),
+    ).filter(
+        Q(search_vector=query) |
+        Q(search_name__contains=phrase_norm) |
+        Q(owner_id__in=owners)
+    ).annotate(
+        rank=keyset_rank(
+            SearchRank(F('search_vector'), query) +
+            TrigramSimilarity(F('search_name'), phrase_norm) +
+            TrigramSimilarity(normalized(full_name('owner__')), phrase_norm)
+        )
+    )
@@ -1,4 +1,5 @@
 
+from django.db import transaction
 from rest_framework import serializers
 from . import models
 from accounts  import models as account_models
@@ -12,7 +13,7 @@ ALLOWED_SUPERVISOR_ORDERS = os.getenv('ALLOWED_SUPERVISOR_ORDERS').split(',')
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Tag
-        fields = '__all__'
+        fields = ('id', 'name')
 
     def create(self, validated_data):
         tag = models.Tag.objects.create(**validated_data)
@@ -38,14 +39,13 @@ class ThesisSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Thesis
-        fields = '__all__'
+        exclude = ('search_vector', 'tag_ids', 'updated_at')
 
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        discarded_fields = self.context.get("discarded_fields", [])
-        for field in discarded_fields:
-            data.pop(field, None)
-        return data
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in self.context.get("discarded_fields", []):
+            fields.pop(field, None)
+        return fields
 
 class UpdateThesisSerializer(serializers.Serializer):
     title = serializers.CharField(required=False, default="")
@@ -73,7 +73,8 @@ class UpdateThesisSerializer(serializers.Serializer):
             try:
                 account_models.SystemUser.objects.get(
                     id=producer_id,
-                    is_student=True
+                    is_student=True,
+                    is_active=True
                 )
             except account_models.SystemUser.DoesNotExist:
                 raise serializers.ValidationError(f"Student o ID {producer_id} nie istnieje")
@@ -111,13 +112,30 @@ class UpdateThesisSerializer(serializers.Serializer):
         tags = validated_data.pop("tags")
         for key, value in validated_data.items():
             setattr(instance, key, value)
-        instance.save()
-        instance.tags.set(tags)
+        instance.tag_ids = sorted(tag.id for tag in tags)
+        with transaction.atomic():
+            # status and producer change only through conditional updates
+            instance.save(update_fields=[*validated_data, 'tag_ids', 'updated_at'])
+            instance.tags.set(tags)
         return instance
 
+class ThesisStatusChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.CharField()
+
+class BulkThesisStatusSerializer(serializers.Serializer):
+    theses = ThesisStatusChangeSerializer(many=True, allow_empty=False)
+
+    def validate_theses(self, value):
+        ids = [change["id"] for change in value]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Każda praca może wystąpić w żądaniu tylko raz")
+        return value
+
 class ListThesesSerializer(serializers.Serializer):
     fieldOfStudy = serializers.IntegerField(default=None)
     tags = serializers.CharField(default=None)
+    tagsMode = serializers.ChoiceField(['any', 'all'], default='any')
     order = serializers.CharField(default=None)
     ascending = serializers.BooleanField(default=True)
     available = serializers.CharField(required=False, allow_null=True)
@@ -140,6 +158,7 @@ class ListThesesSerializer(serializers.Serializer):
                 raise serializers.ValidationError("Niepoprawny format identyfikatorów tagów")
             valid_tags = validate_tags(tag_ids)
             attrs['tags'] = valid_tags
+            attrs['tag_ids'] = tag_ids
 
         order = attrs.get('order')
         if order is not None:
@@ -151,6 +170,11 @@ class ListThesesSerializer(serializers.Serializer):
 
         return attrs
 
+class AvailableStudentsSerializer(serializers.Serializer):
+    thesis_id = serializers.IntegerField(error_messages={'required': "Brak ID pracy.", 'invalid': "Niepoprawne ID pracy."})
+    # an empty search (a cleared typeahead) lists all students
+    search = serializers.CharField(default=None, allow_blank=True)
+
 class ListSupervisorsSerializer(serializers.Serializer):
     fieldOfStudy = serializers.IntegerField(default=None)
     tags = serializers.CharField(default=None)
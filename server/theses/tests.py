@@ -1 +1,434 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import models as account_models
+from accounts.authentication import add_user_claims
+from utils.db_router import REPLICA, ReplicaRouter, unpin
+
+from . import models, serializers, transitions
+from .pagination import KeysetPagination
+from .transitions import reserve_thesis
+
+SIZES = (2, 10)
+
+
+def authorized_client(user):
+    client = APIClient()
+    token = add_user_claims(RefreshToken.for_user(user), user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Read endpoints run a fixed number of queries, whatever the size of the
+    page or of the related sets. Each endpoint is requested once before
+    counting, so the token version and reference caches are warm.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fields_of_study = account_models.FieldOfStudy.objects.bulk_create(
+            account_models.FieldOfStudy(name=f"Kierunek {i}") for i in range(max(SIZES))
+        )
+        cls.tags = models.Tag.objects.bulk_create(models.Tag(name=f"Tag {i}") for i in range(max(SIZES)))
+        cls.student = account_models.SystemUser.objects.create(
+            email="student@student.agh.edu.pl", is_student=True
+        )
+        cls.student.field_of_study.add(cls.fields_of_study[0])
+        # one supervisor and thesis per size, with that many theses, fields of study and tags
+        cls.supervisors, cls.theses, cls.producers = {}, {}, {}
+        for size in SIZES:
+            supervisor = account_models.SystemUser.objects.create(
+                email=f"promotor{size}@agh.edu.pl", is_supervisor=True, total_spots=size
+            )
+            supervisor.field_of_study.add(*cls.fields_of_study[:size])
+            producer = account_models.SystemUser.objects.create(
+                email=f"student{size}@student.agh.edu.pl", is_student=True
+            )
+            theses = models.Thesis.objects.bulk_create(
+                models.Thesis(
+                    name=f"Praca {size}-{i}",
+                    owner=supervisor,
+                    producer=producer if i == 0 else None,
+                    field_of_study=cls.fields_of_study[0],
+                    status="Zarezerwowany" if i == 0 else "Dostępny",
+                    tag_ids=[tag.id for tag in cls.tags[:size]],
+                )
+                for i in range(size)
+            )
+            ThesisTags = models.Thesis.tags.through
+            ThesisTags.objects.bulk_create(
+                ThesisTags(thesis_id=thesis.id, tag_id=tag.id) for thesis in theses for tag in cls.tags[:size]
+            )
+            cls.supervisors[size], cls.theses[size], cls.producers[size] = supervisor, theses[0], producer
+
+    def setUp(self):
+        cache.clear()
+        self.client = authorized_client(self.student)
+
+    def assertQueries(self, budget, path, query=None):
+        self.assertEqual(self.client.get(path, query).status_code, 200)
+        with self.assertNumQueries(budget):
+            response = self.client.get(path, query)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_thesis_list(self):
+        for size in SIZES:
+            with self.subTest(page_size=size), mock.patch.object(KeysetPagination, 'page_size', size):
+                response = self.assertQueries(3, "/api/thesis/list/")
+                self.assertEqual(len(response.data["results"]), size)
+
+    def test_thesis_list_keyset(self):
+        for size in SIZES:
+            with self.subTest(page_size=size), mock.patch.object(KeysetPagination, 'page_size', size):
+                response = self.assertQueries(2, "/api/thesis/list/", {"cursor": ""})
+                self.assertEqual(len(response.data["results"]), size)
+
+    def test_supervisors_list(self):
+        for size in SIZES:
+            with self.subTest(page_size=size), mock.patch.object(KeysetPagination, 'page_size', size):
+                self.assertQueries(3, "/api/supervisors/list/")
+                self.assertQueries(2, "/api/supervisors/list/", {"cursor": ""})
+
+    def test_thesis_detail(self):
+        for size in SIZES:
+            with self.subTest(tags=size):
+                response = self.assertQueries(3, f"/api/thesis/{self.theses[size].id}/")
+                self.assertEqual(len(response.data["tags"]), size)
+
+    def test_supervisor_theses(self):
+        for size in SIZES:
+            with self.subTest(theses=size):
+                response = self.assertQueries(3, f"/api/thesis/supervisor/{self.supervisors[size].id}/")
+                self.assertEqual(len(response.data["theses"]), size)
+
+    def test_thesis_by_producer(self):
+        for size in SIZES:
+            with self.subTest(tags=size):
+                response = self.assertQueries(2, f"/api/thesis/producer/{self.producers[size].id}/")
+                self.assertEqual(len(response.data["tags"]), size)
+
+    def test_supervisor_detail(self):
+        for size in SIZES:
+            with self.subTest(fields_of_study=size):
+                response = self.assertQueries(2, f"/api/supervisors/{self.supervisors[size].id}/")
+                self.assertEqual(len(response.data["field_of_study"]), size)
+
+
+class SearchKeysetTests(TestCase):
+    """
+    Following `next` through a list ordered by search rank returns every
+    match exactly once, including rows tied on rank at a page boundary.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        field_of_study = account_models.FieldOfStudy.objects.create(name="Informatyka")
+        cls.student = account_models.SystemUser.objects.create(email="student@student.agh.edu.pl", is_student=True)
+        cls.student.field_of_study.add(field_of_study)
+        supervisors = account_models.SystemUser.objects.bulk_create(
+            account_models.SystemUser(
+                email=f"promotor{i}@agh.edu.pl", first_name="Jan", last_name=f"Kowalski{'ski' * (i % 3)}",
+                is_supervisor=True
+            )
+            for i in range(9)
+        )
+        Through = account_models.SystemUser.field_of_study.through
+        Through.objects.bulk_create(
+            Through(systemuser_id=supervisor.id, fieldofstudy_id=field_of_study.id) for supervisor in supervisors
+        )
+        models.Thesis.objects.bulk_create(
+            models.Thesis(
+                name=f"Analiza sieci neuronowych{' rekurencyjnych' * (i % 3)} {i}", owner=supervisors[i],
+                field_of_study=field_of_study, status="Dostępny"
+            )
+            for i in range(9)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = authorized_client(self.student)
+
+    def walk(self, path, search):
+        ids, query = [], {"search": search, "cursor": ""}
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            while True:
+                response = self.client.get(path, query)
+                self.assertEqual(response.status_code, 200)
+                ids += [row["id"] for row in response.data["results"]]
+                if response.data["next"] is None:
+                    return ids
+                self.assertLess(len(ids), 20, "next does not move forward")
+                query = {"search": search, "cursor": parse_qs(urlsplit(response.data["next"]).query)["cursor"][0]}
+
+    def test_thesis_list(self):
+        ids = self.walk("/api/thesis/list/", "sieci neuronowych")
+        self.assertCountEqual(ids, models.Thesis.objects.values_list('id', flat=True))
+
+    def test_supervisors_list(self):
+        ids = self.walk("/api/supervisors/list/", "kowalski")
+        self.assertCountEqual(ids, account_models.SystemUser.objects.filter(is_supervisor=True).values_list('id', flat=True))
+
+
+class ConcurrentChangeTests(TestCase):
+    """
+    A reservation committed between reading a thesis and writing it back is
+    not reverted by the supervisor's change.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        field_of_study = account_models.FieldOfStudy.objects.create(name="Informatyka")
+        cls.supervisor = account_models.SystemUser.objects.create(
+            email="promotor@agh.edu.pl", is_supervisor=True, total_spots=2, thesis_count=1
+        )
+        cls.supervisor.field_of_study.add(field_of_study)
+        cls.student = account_models.SystemUser.objects.create(email="student@student.agh.edu.pl", is_student=True)
+        cls.thesis = models.Thesis.objects.create(
+            name="Praca", owner=cls.supervisor, field_of_study=field_of_study, status="Dostępny"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = authorized_client(self.supervisor)
+
+    def reserving(self, function):
+        def wrapper(*args, **kwargs):
+            self.assertTrue(reserve_thesis(self.thesis.id, self.student.id))
+            return function(*args, **kwargs)
+        return wrapper
+
+    def assertReserved(self):
+        thesis = models.Thesis.objects.get(id=self.thesis.id)
+        self.assertEqual((thesis.status, thesis.producer_id), ("Zarezerwowany", self.student.id))
+        self.assertEqual(account_models.SystemUser.objects.get(id=self.supervisor.id).taken_spots, 1)
+        return thesis
+
+    def test_status_change_after_reservation(self):
+        with mock.patch("theses.views.transition_error", self.reserving(transitions.transition_error)):
+            response = self.client.put(
+                f"/api/theses/{self.thesis.id}/status/edit/", {"status": "Ukryty"}, format="json"
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertReserved()
+
+    def test_edit_after_reservation(self):
+        with mock.patch("theses.serializers.validate_tags", self.reserving(serializers.validate_tags)):
+            response = self.client.put(
+                f"/api/theses/{self.thesis.id}/edit/",
+                {"title": "Nowy tytuł", "tags": [], "fieldOfStudy": {"id": self.thesis.field_of_study_id}},
+                format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.assertReserved().name, "Nowy tytuł")
+
+
+class AvailableStudentsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        field_of_study = account_models.FieldOfStudy.objects.create(name="Informatyka")
+        cls.supervisor = account_models.SystemUser.objects.create(email="promotor@agh.edu.pl", is_supervisor=True)
+        cls.thesis = models.Thesis.objects.create(
+            name="Praca", owner=cls.supervisor, field_of_study=field_of_study, status="Dostępny"
+        )
+        for email, last_name in (("anowak@student.agh.edu.pl", "Nowak"), ("jkowalski@student.agh.edu.pl", "Kowalski")):
+            student = account_models.SystemUser.objects.create(email=email, last_name=last_name, is_student=True)
+            student.field_of_study.add(field_of_study)
+
+    def setUp(self):
+        cache.clear()
+        self.client = authorized_client(self.supervisor)
+
+    def emails(self, **params):
+        response = self.client.get("/api/students/available/", {"thesis_id": self.thesis.id, **params})
+        self.assertEqual(response.status_code, 200)
+        return [student["email"] for student in response.data["results"]]
+
+    def test_search(self):
+        self.assertEqual(self.emails(search="now"), ["anowak@student.agh.edu.pl"])
+
+    def test_empty_search_lists_all(self):
+        everyone = ["jkowalski@student.agh.edu.pl", "anowak@student.agh.edu.pl"]
+        self.assertEqual(self.emails(), everyone)
+        self.assertEqual(self.emails(search="", cursor=""), everyone)
+
+
+class ReservationRushTests(TransactionTestCase):
+    """
+    Simultaneous reservations from many threads, each on its own connection.
+    At most CONCURRENCY at once, so every thread gets a pooled connection.
+    """
+    CONCURRENCY = 8
+
+    def setUp(self):
+        cache.clear()
+        self.field_of_study = account_models.FieldOfStudy.objects.create(name="Informatyka")
+        self.supervisor = account_models.SystemUser.objects.create(
+            email="promotor@agh.edu.pl", is_supervisor=True, total_spots=3, thesis_count=3
+        )
+        self.students = account_models.SystemUser.objects.bulk_create(
+            account_models.SystemUser(email=f"student{i}@student.agh.edu.pl", is_student=True)
+            for i in range(self.CONCURRENCY)
+        )
+        self.theses = models.Thesis.objects.bulk_create(
+            models.Thesis(name=f"Praca {i}", owner=self.supervisor, field_of_study=self.field_of_study, status="Dostępny")
+            for i in range(3)
+        )
+
+    def rush(self, attempts):
+        """
+        Status codes of (student, thesis) reservations released at once.
+        """
+        self.assertLessEqual(len(attempts), self.CONCURRENCY)
+        barrier = threading.Barrier(len(attempts))
+        clients = {student.id: authorized_client(student) for student, _ in attempts}
+
+        def reserve(attempt):
+            student, thesis = attempt
+            client = clients[student.id]
+            try:
+                barrier.wait()
+                return client.put(
+                    f"/api/theses/{thesis.id}/status/edit/", {"status": "Zarezerwowany"}, format="json"
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(attempts)) as executor:
+            codes = list(executor.map(reserve, attempts))
+        self.assertLessEqual(set(codes), {200, 409})
+        return codes
+
+    def assertCapacity(self, taken):
+        supervisor = account_models.SystemUser.objects.get(id=self.supervisor.id)
+        self.assertEqual(supervisor.taken_spots, taken)
+        self.assertLessEqual(supervisor.taken_spots, supervisor.total_spots)
+
+    def test_one_winner_per_thesis(self):
+        thesis = self.theses[0]
+        codes = self.rush([(student, thesis) for student in self.students])
+
+        winners = [student.id for student, code in zip(self.students, codes) if code == 200]
+        self.assertEqual(len(winners), 1)
+        thesis.refresh_from_db()
+        self.assertEqual((thesis.status, thesis.producer_id), ("Zarezerwowany", winners[0]))
+        self.assertCapacity(1)
+
+    def test_one_thesis_per_student(self):
+        student = self.students[0]
+        codes = self.rush([(student, thesis) for thesis in self.theses])
+
+        self.assertEqual(codes.count(200), 1)
+        self.assertEqual(models.Thesis.objects.filter(producer=student).count(), 1)
+        self.assertFalse(models.Thesis.objects.filter(status="Zarezerwowany", producer__isnull=True).exists())
+        self.assertCapacity(1)
+
+    def test_all_theses_taken_once(self):
+        theses = self.theses[:2]
+        codes = self.rush([(student, thesis) for student in self.students[:4] for thesis in theses])
+
+        self.assertEqual(codes.count(200), len(theses))
+        producers = models.Thesis.objects.filter(
+            id__in=[thesis.id for thesis in theses]
+        ).values_list('producer_id', flat=True)
+        self.assertNotIn(None, producers)
+        self.assertEqual(len(set(producers)), len(theses))
+        self.assertCapacity(len(theses))
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Safe requests to ReplicaReadsMixin views read from the replica, except for
+    users who just wrote. The test database has no replica, so the router's
+    decisions are recorded while the reads still go to the primary.
+    """
+
+    def setUp(self):
+        cache.clear()
+        field_of_study = account_models.FieldOfStudy.objects.create(name="Informatyka")
+        self.supervisor = account_models.SystemUser.objects.create(
+            email="promotor@agh.edu.pl", is_supervisor=True, total_spots=1, thesis_count=1
+        )
+        self.student = account_models.SystemUser.objects.create(email="student@student.agh.edu.pl", is_student=True)
+        self.student.field_of_study.add(field_of_study)
+        self.thesis = models.Thesis.objects.create(
+            name="Praca", owner=self.supervisor, field_of_study=field_of_study, status="Dostępny"
+        )
+        self.client = authorized_client(self.student)
+
+    def routed(self, send):
+        """
+        The response to `send()` and whether any of its reads was routed to the replica.
+        """
+        decisions = []
+        route = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            decisions.append(route(router, model, **hints))
+
+        with (
+            mock.patch.object(ReplicaRouter, 'db_for_read', record),
+            mock.patch('utils.db_router.replica_configured', return_value=True),
+        ):
+            response = send()
+        return response, REPLICA in decisions
+
+    def read(self, client=None):
+        response, replica = self.routed(lambda: (client or self.client).get(f"/api/thesis/{self.thesis.id}/"))
+        self.assertEqual(response.status_code, 200)
+        return replica
+
+    def test_safe_reads_use_replica(self):
+        for path in (
+            f"/api/thesis/{self.thesis.id}/",
+            "/api/thesis/list/",
+            "/api/supervisors/list/",
+            f"/api/supervisors/{self.supervisor.id}/",
+            f"/api/thesis/supervisor/{self.supervisor.id}/",
+        ):
+            with self.subTest(path=path):
+                response, replica = self.routed(lambda path=path: self.client.get(path))
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(replica)
+
+    def test_writer_sticks_to_primary(self):
+        self.assertTrue(self.read())
+        response, replica = self.routed(lambda: self.client.put(
+            f"/api/theses/{self.thesis.id}/status/edit/", {"status": "Zarezerwowany"}, format="json"
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(replica)
+
+        self.assertFalse(self.read())
+        self.assertTrue(self.read(authorized_client(self.supervisor)))
+        unpin(self.student.pk)
+        self.assertTrue(self.read())
+
+    def test_transaction_reads_primary(self):
+        with transaction.atomic():
+            self.assertFalse(self.read())
+
+
+class MetricsEndpointTests(TestCase):
+
+    @override_settings(METRICS_TOKEN='')
+    def test_hidden_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN='sekret')
+    def test_requires_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer sekret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"promotornia_request_duration_seconds", response.content)
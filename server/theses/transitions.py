@@ -0,0 +1,95 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import models
+from .capacity import is_taken, update_capacity
+
+VALID_TRANSITIONS = {
+    ("Ukryty", "Dostępny"): ["supervisor"],
+    ("Dostępny", "Ukryty"): ["supervisor"],
+    ("Zarezerwowany", "Ukryty"): ["supervisor"],
+    ("Dostępny", "Zarezerwowany"): ["student"],
+    ("Zarezerwowany", "Student zaakceptowany"): ["supervisor"],
+    ("Student zaakceptowany", "Zatwierdzony"): ["student"],
+    ("Zarezerwowany", "Dostępny"): ["student", "supervisor"],
+    ("Student zaakceptowany", "Dostępny"): ["student"],
+}
+
+RELEASING_STATUSES = ["Dostępny", "Ukryty"]
+
+
+def transition_error(thesis, new_status, user, field_of_study=None):
+    """
+    Check whether `user` may move `thesis` to `new_status`. Returns the error
+    message, or None if the transition is allowed.
+    """
+    current_status = thesis.status
+
+    if (
+        "ukryty" == current_status.lower() != new_status.lower() and
+        thesis.field_of_study_id is field_of_study is None
+    ):
+        return "Nie można opublikować pracy dyplomowej bez ustawienia kierunku studiów!"
+
+    if (current_status, new_status) not in VALID_TRANSITIONS:
+        return f"Nie można zmienić statusu z '{current_status}' na '{new_status}'"
+
+    required_roles = VALID_TRANSITIONS[(current_status, new_status)]
+
+    if "student" in required_roles and user.is_student:
+        pass  # OK
+    elif "supervisor" in required_roles and user.is_supervisor:
+        if thesis.owner_id != user.id:
+            return "Nie jesteś promotorem tej pracy"
+    else:
+        return "Nie masz uprawnień do wykonania tej zmiany"
+
+    if (
+        user.is_student and
+        (current_status, new_status) != ("Dostępny", "Zarezerwowany") and
+        thesis.producer_id != user.id
+    ):
+        return "Nie jesteś przypisanym studentem"
+
+    return None
+
+
+def reserve_thesis(thesis_id, producer_id, **conditions):
+    """
+    Claim an available thesis for a student with a single conditional UPDATE.
+    Returns False if the thesis was not available any more. Raises
+    IntegrityError if the student already has another thesis.
+    """
+    with transaction.atomic():
+        claimed = models.Thesis.objects.filter(
+            id=thesis_id,
+            status="Dostępny",
+            **conditions
+        ).update(
+            status="Zarezerwowany",
+            producer_id=producer_id,
+            updated_at=timezone.now()
+        )
+        if claimed:
+            update_capacity(models.Thesis.objects.filter(id=thesis_id).values('owner_id')[:1], taken=1)
+    return bool(claimed)
+
+
+def release_theses(producer_ids):
+    """
+    Make the theses of the given students available again with one UPDATE,
+    e.g. before the students are deleted. Returns the number of released theses.
+    """
+    with transaction.atomic():
+        theses = models.Thesis.objects.filter(producer_id__in=producer_ids)
+        taken = Counter(
+            owner_id
+            for owner_id, status in theses.select_for_update().values_list('owner_id', 'status')
+            if is_taken(status)
+        )
+        released = theses.update(status="Dostępny", producer=None, updated_at=timezone.now())
+        for owner_id, count in taken.items():
+            update_capacity(owner_id, taken=-count)
+    return released
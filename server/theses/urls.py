@@ -14,6 +14,7 @@ urlpatterns = [
     path('thesis/new/', views.CreateThesisView.as_view(), name='thesis-nes'),
     path('theses/<int:thesis_id>/edit/', views.ThesisView.as_view(), name='thesis-edit'),
     path('theses/<int:thesis_id>/status/edit/', views.ThesisStatus.as_view(), name='thesis-status-edit'),
+    path('theses/status/edit/', views.BulkThesisStatus.as_view(), name='theses-status-bulk-edit'),
     path('thesis/producer/<int:producer_id>/', views.ThesisByProducerView.as_view(), name='thesis-by-producer'),
     path('students/available/', views.AvailableStudentsView.as_view(), name='available-students'),
     path('theses/<int:thesis_id>/assign_student/', views.AssignStudentView.as_view(), name='assign-student'),
@@ -1,3 +1,4 @@
+from asgiref.sync import sync_to_async
 from humps.main import decamelize
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -5,33 +6,50 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from rest_framework.pagination import PageNumberPagination
-
 from . import serializers
 from . import models
-
-from django.db.models import Count, F, Value, Q, ExpressionWrapper, IntegerField
+from .capacity import TAKEN_STATUSES, taken_delta, update_capacity
+from .pagination import KeysetPagination
+from .projections import thesis_list_items, thesis_list_rows
+from .search import search_students, search_supervisors, search_theses
+from .transitions import RELEASING_STATUSES, reserve_thesis, transition_error
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import F, Value
 from django.db.models.functions import Concat
 
 from accounts import permissions as account_permissions
 from accounts import serializers as account_serializers
 from accounts import models as account_models
+from utils.cache import bump_version, cached_json_response
+from utils.async_views import AsyncAPIView, AsyncListAPIView, gather_queries
+from utils.conditional import aget_validators, get_validators, not_modified, set_validators
+from utils.db_router import ReplicaReadsMixin
+from utils.metrics import measure
 
 import os
 
 ITEMS_PER_PAGE = os.getenv('ITEMS_PER_PAGE')
 THESIS_STATUSES = os.getenv('THESIS_STATUSES').split(',')
+THESIS_TIMESTAMPS = ('updated_at', 'owner__updated_at', 'field_of_study__updated_at')
 
-class ThesisView(APIView):
+class ThesisView(ReplicaReadsMixin, AsyncAPIView):
 
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, thesis_id):
-        thesis = models.Thesis.objects.filter(id=thesis_id)
-        if thesis.count() > 0:
-            thesis = thesis[0]
-            resp = serializers.ThesisSerializer(thesis).data
-            return Response(resp, status=status.HTTP_200_OK)
+    async def get(self, request, thesis_id):
+        theses = models.Thesis.objects.filter(id=thesis_id)
+        validators = await aget_validators(theses, *THESIS_TIMESTAMPS, 'producer__updated_at')
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+
+        thesis = await theses.with_relations().afirst()
+        if thesis is not None:
+            with measure('serialize'):
+                resp = serializers.ThesisSerializer(thesis).data
+            return set_validators(Response(resp, status=status.HTTP_200_OK), *validators)
         return Response({}, status=status.HTTP_404_NOT_FOUND)
 
     def put(self, request, thesis_id):
@@ -40,7 +58,8 @@ class ThesisView(APIView):
         except models.Thesis.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        data = decamelize(request.data)
+        with measure('parse'):
+            data = decamelize(request.data)
         fos = thesis.field_of_study
         target_fos = data.get("field_of_study")
         if target_fos is not None:
@@ -78,7 +97,9 @@ class ThesisView(APIView):
                 thesis.status.lower() != "ukryty"
             ):
                 return Response(status=status.HTTP_403_FORBIDDEN)
-            thesis.delete()
+            with transaction.atomic():
+                thesis.delete()
+                update_capacity(thesis.owner_id, theses=-1, taken=-taken_delta(thesis.status, None))
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({}, status=status.HTTP_404_NOT_FOUND)
     
@@ -87,123 +108,161 @@ class ThesisStatus(APIView):
     permission_classes = [IsAuthenticated]
 
     def put(self, request, thesis_id):
-        try:
-            thesis = models.Thesis.objects.get(id=thesis_id)
-        except models.Thesis.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
-
         user = request.user
-        data = decamelize(request.data)
+        with measure('parse'):
+            data = decamelize(request.data)
         new_status = data.get("status")
 
         if new_status is None:
             return Response({"message": "Brak statusu w żądaniu"}, status=status.HTTP_400_BAD_REQUEST)
 
-        current_status = thesis.status
+        if user.is_student and new_status == "Zarezerwowany":
+            return self.reserve(user, thesis_id, data)
 
-        if (
-            "ukryty" == current_status.lower() != new_status.lower() and
-            thesis.field_of_study is data.get("field_of_study") is None
-        ):
-            return Response(
-                {"message": "Nie można opublikować pracy dyplomowej bez ustawienia kierunku studiów!"},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        try:
+            thesis = models.Thesis.objects.get(id=thesis_id)
+        except models.Thesis.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        current_status = thesis.status
 
-        valid_transitions = {
-            ("Ukryty", "Dostępny"): ["supervisor"],
-            ("Dostępny", "Ukryty"): ["supervisor"],
-            ("Zarezerwowany", "Ukryty"): ["supervisor"],
-            ("Dostępny", "Zarezerwowany"): ["student"],
-            ("Zarezerwowany", "Student zaakceptowany"): ["supervisor"],
-            ("Student zaakceptowany", "Zatwierdzony"): ["student"],
-            ("Zarezerwowany", "Dostępny"): ["student", "supervisor"],
-            ("Student zaakceptowany", "Dostępny"): ["student"],
-        }
-        if (current_status, new_status) not in valid_transitions:
-            return Response({"message": f"Nie można zmienić statusu z '{current_status}' na '{new_status}'"},
-                            status=status.HTTP_403_FORBIDDEN)
-
-        required_roles = valid_transitions[(current_status, new_status)]
-
-        if "student" in required_roles and user.is_student:
-            pass  # OK
-        elif "supervisor" in required_roles and user.is_supervisor:
-            if thesis.owner != user:
-                return Response({"message": "Nie jesteś promotorem tej pracy"}, status=status.HTTP_403_FORBIDDEN)
-        else:
-            return Response({"message": "Nie masz uprawnień do wykonania tej zmiany"}, status=status.HTTP_403_FORBIDDEN)
-
-        if user.is_student:
-            if (current_status, new_status) == ("Dostępny", "Zarezerwowany"):
-                thesis.producer = user
-            elif thesis.producer != user:
-                return Response({"message": "Nie jesteś przypisanym studentem"}, status=status.HTTP_403_FORBIDDEN)
-            
-        if new_status == "Dostępny" or new_status == "Ukryty":
-            thesis.producer = None
-
-        thesis.status = new_status
-        thesis.save()
+        error = transition_error(thesis, new_status, user, data.get("field_of_study"))
+        if error is not None:
+            return Response({"message": error}, status=status.HTTP_403_FORBIDDEN)
+
+        values = {"status": new_status, "updated_at": timezone.now()}
+        if new_status in RELEASING_STATUSES:
+            values["producer"] = None
+
+        with transaction.atomic():
+            # applies only if nobody changed the thesis since it was checked, e.g. reserved it
+            changed = models.Thesis.objects.filter(
+                id=thesis.id, status=current_status, producer_id=thesis.producer_id
+            ).update(**values)
+            if not changed:
+                return Response(
+                    {"message": "Status pracy został w międzyczasie zmieniony, odśwież stronę"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            update_capacity(thesis.owner_id, taken=taken_delta(current_status, new_status))
         return Response({"message": "Status został zmieniony"}, status=status.HTTP_200_OK)
 
+    def reserve(self, user, thesis_id, data):
+        try:
+            if reserve_thesis(thesis_id, user.id):
+                return Response({"message": "Status został zmieniony"}, status=status.HTTP_200_OK)
+        except IntegrityError:
+            return Response({"message": "Masz już zarezerwowaną pracę dyplomową"}, status=status.HTTP_409_CONFLICT)
+
+        thesis = models.Thesis.objects.filter(id=thesis_id).first()
+        if thesis is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if thesis.status in TAKEN_STATUSES:
+            return Response({"message": "Ta praca została już zarezerwowana"}, status=status.HTTP_409_CONFLICT)
+        error = transition_error(thesis, "Zarezerwowany", user, data.get("field_of_study"))
+        return Response({"message": error}, status=status.HTTP_403_FORBIDDEN)
+
+class BulkThesisStatus(APIView):
+    permission_classes = (account_permissions.IsSupervisor,)
+
+    def put(self, request):
+        with measure('parse'):
+            data = decamelize(request.data)
+        serializer = serializers.BulkThesisStatusSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        changes = {change["id"]: change["status"] for change in serializer.validated_data["theses"]}
+        results = {thesis_id: None for thesis_id in changes}
+        by_status = {}
+
+        with transaction.atomic():
+            theses = models.Thesis.objects.select_for_update().filter(id__in=changes).order_by("id")
+            taken = 0
+            for thesis in theses:
+                new_status = changes[thesis.id]
+                error = transition_error(thesis, new_status, user)
+                if error is not None:
+                    results[thesis.id] = {"id": thesis.id, "success": False, "message": error}
+                    continue
+                by_status.setdefault(new_status, []).append(thesis.id)
+                taken += taken_delta(thesis.status, new_status)
+                results[thesis.id] = {"id": thesis.id, "success": True, "status": new_status}
+
+            now = timezone.now()
+            for new_status, ids in by_status.items():
+                values = {"status": new_status, "updated_at": now}
+                if new_status in RELEASING_STATUSES:
+                    values["producer"] = None
+                models.Thesis.objects.filter(id__in=ids).update(**values)
+            update_capacity(user.id, taken=taken)
+
+        for thesis_id, result in results.items():
+            if result is None:
+                results[thesis_id] = {"id": thesis_id, "success": False, "message": "Nie znaleziono pracy"}
+        return Response({"results": list(results.values())}, status=status.HTTP_200_OK)
+
 class CreateThesisView(APIView):
     permission_classes = [account_permissions.IsSupervisor]
 
     def get(self, request):
         user = request.user
-        owned_theses = models.Thesis.objects.filter(
-            owner=user,
-        )
-        if owned_theses.count() >= user.total_spots:
-            return Response(
-                {"message": "Maksymalna liczba dozwolonych prac osiągnięta"},
-                status=status.HTTP_403_FORBIDDEN
-            )
+        with transaction.atomic():
+            reserved = account_models.SystemUser.objects.filter(
+                id=user.id,
+                thesis_count__lt=F('total_spots')
+            ).update(thesis_count=F('thesis_count') + 1)
+            if not reserved:
+                return Response(
+                    {"message": "Maksymalna liczba dozwolonych prac osiągnięta"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+            thesis = models.Thesis.objects.create(
+                owner=request.user,
+                description="Podaj opis pracy",
+                prerequisites="Podaj opis wymagań wstępnych",
 
-        thesis = models.Thesis.objects.create(
-            owner=request.user,
-            description="Podaj opis pracy",
-            prerequisites="Podaj opis wymagań wstępnych",
-
-        )
-        thesis.name = f"Praca nr. {thesis.id}. Podaj nazwę pracy"
-        thesis.save()
+            )
+            thesis.name = f"Praca nr. {thesis.id}. Podaj nazwę pracy"
+            thesis.save()
         return Response({"id": thesis.id}, status=status.HTTP_200_OK)
 
-class ThesisListView(ListAPIView):
+class ThesisListView(ReplicaReadsMixin, AsyncListAPIView):
     serializer_class = serializers.ThesisSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         serializer = serializers.ListThesesSerializer(data=self.request.GET)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         field_of_study = serializer.validated_data.get('fieldOfStudy')
-        tags = serializer.validated_data.get('tags')
+        tag_ids = serializer.validated_data.get('tag_ids')
+        tags_mode = serializer.validated_data.get('tagsMode')
         search = serializer.validated_data.get('search')
         available = serializer.validated_data.get('available')
         order = serializer.validated_data.get('order')
         ascending = serializer.validated_data.get('ascending')
 
-        objects = models.Thesis.objects.all().annotate(
+        objects = models.Thesis.objects.annotate(
             full_name=Concat(F('owner__first_name'), Value(' '), F('owner__last_name'))
         )
         if self.request.user.is_student:
-            objects = objects.filter(field_of_study__in=self.request.user.field_of_study.values_list('id', flat=True))
+            objects = objects.filter(field_of_study__in=self.request.user.field_of_study_ids)
 
         if field_of_study is not None:
             objects = objects.filter(field_of_study__id=field_of_study)
 
-        if tags is not None:
-            objects = objects.filter(tags__in=tags).distinct()
+        if tag_ids is not None:
+            if tags_mode == 'all':
+                objects = objects.filter(tag_ids__contains=tag_ids)
+            else:
+                objects = objects.filter(tag_ids__overlap=tag_ids)
 
         if search is not None:
-            objects = (objects.filter(
-                Q(name__icontains=search) | Q(full_name__icontains=search))
-            )
+            objects = search_theses(objects, search)
 
         if available is not None:
             if available == "available":
@@ -222,22 +281,35 @@ class ThesisListView(ListAPIView):
                     objects = objects.order_by(f"{desc}full_name")
                 case 'date':
                     objects = objects.order_by(f"{desc}date_of_creation")
+        elif search is not None:
+            objects = objects.order_by('-rank')
         return objects
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context["discarded_fields"] = ["description", "prerequisites", "producer"]
-        return context
-
-class SupervisorListView(ListAPIView):
+    async def get(self, request, *args, **kwargs):
+        # filter validation may query
+        queryset = await sync_to_async(self.get_queryset)()
+        validators = await aget_validators(queryset, *THESIS_TIMESTAMPS)
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
+
+        rows = thesis_list_rows(queryset)
+        page = await self.apaginate_queryset(rows)
+        if page is None:
+            rows = [row async for row in rows]
+            with measure('serialize'):
+                return set_validators(Response(thesis_list_items(rows)), *validators)
+        with measure('serialize'):
+            return set_validators(self.get_paginated_response(thesis_list_items(page)), *validators)
+
+class SupervisorListView(ReplicaReadsMixin, AsyncListAPIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = PageNumberPagination
+    pagination_class = KeysetPagination
     serializer_class = account_serializers.SupervisorSerializer
 
     def get_queryset(self):
         serializer = serializers.ListSupervisorsSerializer(data=self.request.GET)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.is_valid(raise_exception=True)
 
         field_of_study = serializer.validated_data.get('fieldOfStudy')
         search = serializer.validated_data.get('search')
@@ -245,28 +317,14 @@ class SupervisorListView(ListAPIView):
         available = serializer.validated_data.get('available')
         ascending = serializer.validated_data.get('ascending')
 
-        objects = account_models.SystemUser.objects.filter(is_supervisor=True)
-
-        taken = ['Zarezerwowany', 'Student zaakceptowany', 'Zatwierdzony']
-        objects = objects.annotate(
-            full_name=Concat(F('first_name'), Value(' '), F('last_name')),
-            thesis_count=Count('owned_theses'),
-            taken_spots=Count(
-                'owned_theses',
-                filter=Q(owned_theses__status__in=taken)
-            ),
-            free_spots=ExpressionWrapper(
-                F('thesis_count') - F('taken_spots'),
-                output_field=IntegerField()
-            ),
-        )
+        objects = account_models.SystemUser.objects.filter(is_supervisor=True, is_active=True).prefetch_related('field_of_study')
 
         if self.request.user.is_student:
-            objects = objects.filter(field_of_study__in=self.request.user.field_of_study.values_list('id', flat=True)).distinct()
+            objects = objects.filter(field_of_study__in=self.request.user.field_of_study_ids).distinct()
         if field_of_study is not None:
             objects = objects.filter(field_of_study__id=field_of_study)
         if search is not None:
-            objects = objects.filter(full_name__icontains=search)
+            objects = search_supervisors(objects, search)
         if order is not None:
             desc = '' if ascending else '-'
             match order:
@@ -274,20 +332,30 @@ class SupervisorListView(ListAPIView):
                     objects = objects.order_by(f'{desc}last_name')
                 case 'free_spots':
                     objects = objects.order_by(f'{desc}free_spots')
+        elif search is not None:
+            objects = objects.order_by('-rank')
         if available:
             objects = objects.exclude(free_spots=0)
         return objects
 
-class TagListView(APIView):
+    async def get(self, request, *args, **kwargs):
+        queryset = await sync_to_async(self.get_queryset)()
+        page = await self.apaginate_queryset(queryset)
+        if page is None:
+            supervisors = [supervisor async for supervisor in queryset]
+            with measure('serialize'):
+                return Response(self.get_serializer(supervisors, many=True).data)
+        with measure('serialize'):
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+class TagListView(AsyncAPIView):
 
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        tags = models.Tag.objects.all()
-        tags = serializers.TagSerializer(tags, many=True).data
-        return Response(
-            {"tags": tags},
-            status=status.HTTP_200_OK
+    async def get(self, request):
+        return await sync_to_async(cached_json_response)(
+            "tags", "list",
+            lambda: {"tags": serializers.TagSerializer(models.Tag.objects.all(), many=True).data}
         )
 
 class TagView(APIView):
@@ -298,9 +366,10 @@ class TagView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         tag = serializer.save()
+        bump_version("tags")
         return Response(serializers.TagSerializer(tag).data, status=status.HTTP_201_CREATED)
 
-class SupervisorThesesView(APIView):
+class SupervisorThesesView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, supervisor_id):
@@ -312,80 +381,83 @@ class SupervisorThesesView(APIView):
                 {"error": "Supervisor not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        theses = models.Thesis.objects.filter(owner=supervisor).annotate(
-            full_name=Concat(F('owner__first_name'), Value(' '), F('owner__last_name'))
-        )
-
-        data = serializers.ThesisSerializer(theses, many=True).data
+        theses = models.Thesis.objects.filter(owner=supervisor)
+        validators = get_validators(theses, *THESIS_TIMESTAMPS)
+        response = not_modified(request, *validators)
+        if response is not None:
+            return response
 
-        for record in data:
-            record.pop('description', None)
-            record.pop('prerequisites', None)
-            record.pop('producer', None)
+        rows = list(thesis_list_rows(theses))
+        with measure('serialize'):
+            data = thesis_list_items(rows)
+        return set_validators(Response({"theses": data}, status=status.HTTP_200_OK), *validators)
 
-        return Response({"theses": data}, status=status.HTTP_200_OK)
-
-class SupervisorDetailView(APIView):
+class SupervisorDetailView(ReplicaReadsMixin, AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, supervisor_id):
-        supervisor = account_models.SystemUser.objects.filter(
-            id=supervisor_id, is_supervisor=True
-        ).first()
+    async def get(self, request, supervisor_id):
+        supervisor, fields_of_study = await gather_queries(
+            lambda: account_models.SystemUser.objects.filter(id=supervisor_id, is_supervisor=True).first(),
+            lambda: account_serializers.FieldOfStudySerializer(
+                account_models.FieldOfStudy.objects.filter(systemuser=supervisor_id), many=True
+            ).data,
+        )
         if not supervisor:
             return Response(
                 {"error": "Supervisor not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        data = account_serializers.SupervisorSerializer(supervisor).data
-        taken_spots = supervisor.owned_theses.filter(
-            status__in=["Zarezerwowany", "Zatwierdzony", "Student zaakceptowany"]
-        ).count()
-        thesis_count = supervisor.owned_theses.count()
-        data["thesis_count"] = thesis_count
-        data["free_spots"] = thesis_count - taken_spots
+        with measure('serialize'):
+            data = account_serializers.PreloadedSupervisorSerializer(
+                supervisor, context={"fields_of_study": fields_of_study}
+            ).data
         return Response(data, status=status.HTTP_200_OK)
 
 class ThesisByProducerView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, producer_id):
-        thesis = models.Thesis.objects.filter(producer_id=producer_id).first()
+        thesis = models.Thesis.objects.with_relations().filter(producer_id=producer_id).first()
         if not thesis:
             return Response(
                 {"error": "Thesis not found for the given producer ID"},
                 status=status.HTTP_404_NOT_FOUND
             )
-        data = serializers.ThesisSerializer(thesis).data
+        with measure('serialize'):
+            data = serializers.ThesisSerializer(thesis).data
         return Response(data, status=status.HTTP_200_OK)
 
-class AvailableStudentsView(APIView):
+class AvailableStudentsView(ListAPIView):
+    """
+    Students without a thesis in the field of study of the given thesis, as a
+    paginated typeahead for the "assign student" picker.
+    """
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
-    def get(self, request):
-        thesis_id = request.query_params.get("thesis_id")
-        if not thesis_id:
-            return Response({"message": "Brak ID pracy."}, status=400)
-        try:
-            thesis = models.Thesis.objects.get(id=thesis_id)
-        except models.Thesis.DoesNotExist:
+    def list(self, request, *args, **kwargs):
+        serializer = serializers.AvailableStudentsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        thesis = models.Thesis.objects.filter(
+            id=serializer.validated_data['thesis_id']
+        ).values('field_of_study_id').first()
+        if thesis is None:
             return Response({"message": "Nie znaleziono pracy."}, status=404)
-        field_of_study = thesis.field_of_study
+
         students = account_models.SystemUser.objects.filter(
             is_student=True,
-            field_of_study=field_of_study,
+            is_active=True,
+            field_of_study=thesis['field_of_study_id'],
             thesis_producer__isnull=True
         )
-        data = [
-            {
-                "id": s.id,
-                "first_name": s.first_name,
-                "last_name": s.last_name,
-                "email": s.email,
-            }
-            for s in students
-        ]
-        return Response({"students": data})
+        search = serializer.validated_data['search']
+        if search:
+            students = search_students(students, search)
+        students = students.order_by('last_name', 'id').values('id', 'first_name', 'last_name', 'email')
+
+        page = self.paginate_queryset(students)
+        return self.get_paginated_response(page)
 
 class AssignStudentView(APIView):
     permission_classes = [IsAuthenticated]
@@ -404,14 +476,17 @@ class AssignStudentView(APIView):
             return Response({"message": "Brak ID studenta."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            student = account_models.SystemUser.objects.get(id=student_id, is_student=True)
+            student = account_models.SystemUser.objects.get(id=student_id, is_student=True, is_active=True)
         except account_models.SystemUser.DoesNotExist:
             return Response({"message": "Nie znaleziono studenta."}, status=status.HTTP_400_BAD_REQUEST)
 
         if models.Thesis.objects.filter(producer_id=student_id).exists():
             return Response({"message": "Student już ma przypisaną pracę."}, status=status.HTTP_400_BAD_REQUEST)
 
-        thesis.producer = student
-        thesis.status = "Zarezerwowany"
-        thesis.save()
+        try:
+            claimed = reserve_thesis(thesis.id, student.id, owner=request.user)
+        except IntegrityError:
+            return Response({"message": "Student już ma przypisaną pracę."}, status=status.HTTP_400_BAD_REQUEST)
+        if not claimed:
+            return Response({"message": "Nie można przypisać studenta."}, status=status.HTTP_403_FORBIDDEN)
         return Response(status=status.HTTP_200_OK)
\ No newline at end of file
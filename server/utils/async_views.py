@@ -0,0 +1,88 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connections
+from django.utils.functional import classproperty
+from rest_framework.generics import ListAPIView
+from rest_framework.views import APIView
+
+
+def _run_query(query):
+    # same connection housekeeping Django does around a request
+    close_old_connections()
+    try:
+        return query()
+    finally:
+        close_old_connections()
+
+
+def _in_transaction():
+    return any(connection.in_atomic_block for connection in connections.all(initialized_only=True))
+
+
+async def gather_queries(*queries):
+    """
+    Run independent ORM calls concurrently and return their results in order.
+
+    The async ORM runs every query of a request on that request's single sync
+    thread, one after another. Here each call gets its own worker thread, and
+    with it its own database connection. Inside a transaction (ATOMIC_REQUESTS,
+    TestCase) the calls run one after another on the request's connection
+    instead, since other connections would not see its uncommitted writes.
+    """
+    if await sync_to_async(_in_transaction)():
+        return [await sync_to_async(query)() for query in queries]
+    return await asyncio.gather(*(
+        sync_to_async(_run_query, thread_sensitive=False)(query) for query in queries
+    ))
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView served as a coroutine, so under ASGI a request waiting on the
+    database does not hold a worker thread. Handlers may be `async def`; sync
+    handlers (e.g. writes) still work and run in a thread. Authentication,
+    permissions and throttling run in a thread as well, since they may query.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:  # noqa: BLE001 - as in APIView.dispatch, unhandled ones are re-raised
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncListAPIView(AsyncAPIView, ListAPIView):
+    """
+    ListAPIView on top of AsyncAPIView; subclasses implement `async def get`.
+    """
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, 'apaginate_queryset'):
+            return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(self.paginate_queryset)(queryset)
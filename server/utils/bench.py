@@ -0,0 +1,184 @@
+import asyncio
+import http.client
+import io
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def latency_summary(latencies):
+    """
+    p50/p95/p99, mean and max of latencies given in seconds, in milliseconds.
+    """
+    if not latencies:
+        return None
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    else:
+        percentiles = latencies * 99
+    return {
+        'p50': round(percentiles[49] * 1000, 3),
+        'p95': round(percentiles[94] * 1000, 3),
+        'p99': round(percentiles[98] * 1000, 3),
+        'mean': round(statistics.fmean(latencies) * 1000, 3),
+        'max': round(max(latencies) * 1000, 3),
+    }
+
+
+def wsgi_request(application, method, path, query='', headers=None, body=b''):
+    """
+    Run one request through a WSGI application in the calling thread; returns the status code.
+    """
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in (headers or {}).items():
+        key = name.upper().replace('-', '_')
+        environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_request(application, method, path, query='', headers=None, body=b''):
+    """
+    Run one request through an ASGI application; returns the status code.
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'content-length', str(len(body)).encode()),
+            *((name.lower().encode(), value.encode()) for name, value in (headers or {}).items()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    received = False
+    finished = asyncio.Event()
+    statuses = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # the client stays connected until the response is complete
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body', False):
+            finished.set()
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+class HttpClient:
+    """
+    Keep-alive HTTP connection to a running server, one per worker thread.
+    """
+
+    def __init__(self, base_url):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.netloc, timeout=60)
+        self.prefix = url.path.rstrip('/')
+
+    def request(self, method, path, query='', headers=None, body=b''):
+        target = f"{self.prefix}{path}" + (f"?{query}" if query else '')
+        try:
+            self.connection.request(method, target, body=body or None, headers=headers or {})
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            raise
+        return response.status
+
+
+def run_threaded(requests, concurrency, make_sender):
+    """
+    Send `requests` from `concurrency` threads. `make_sender()` is called once
+    per thread and returns the callable sending one request and returning its
+    status code. Returns the wall time and (request, status, latency) results.
+    """
+    remaining = iter(requests)
+    lock = threading.Lock()
+    results = []
+
+    def worker():
+        send = make_sender()
+        while True:
+            with lock:
+                request = next(remaining, None)
+            if request is None:
+                return
+            start = time.perf_counter()
+            try:
+                code = send(request)
+            except (OSError, http.client.HTTPException):
+                code = 0
+            results.append((request, code, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return time.perf_counter() - start, results
+
+
+def run_async(requests, concurrency, call):
+    """
+    Like run_threaded, with `call` a coroutine function sending one request
+    and `concurrency` tasks on one event loop, as in a single ASGI worker.
+    """
+    async def run():
+        remaining = iter(requests)
+        results = []
+
+        async def worker():
+            for request in remaining:
+                start = time.perf_counter()
+                code = await call(request)
+                results.append((request, code, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, results
+
+    return asyncio.run(run())
@@ -0,0 +1,56 @@
+import os
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', '86400'))
+
+
+def _version_key(namespace):
+    return f"version:{namespace}"
+
+
+def get_version(namespace):
+    """
+    Current version token of a cached table. A missing (e.g. evicted) version
+    is replaced with a fresh random token, so stale bodies are never reused.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    transaction.on_commit(lambda: cache.set(_version_key(namespace), uuid.uuid4().hex, None))
+
+
+def cached_json_response(namespace, variant, build):
+    """
+    Serve a pre-rendered JSON body for `namespace`, rebuilding it with `build()`
+    only when the namespace version changed since it was cached.
+    """
+    key = f"{namespace}:{get_version(namespace)}:{variant}"
+    body = cache.get(key)
+    if body is None:
+        body = JSONRenderer().render(build())
+        cache.set(key, body, REFERENCE_CACHE_TTL)
+    return HttpResponse(body, content_type=JSONRenderer.media_type)
+
+
+def cached_data(namespace, variant, build):
+    """
+    Like cached_json_response, but returns the cached data itself, so it can
+    be embedded in a larger response.
+    """
+    key = f"{namespace}:{get_version(namespace)}:data:{variant}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, REFERENCE_CACHE_TTL)
+    return data
@@ -0,0 +1,43 @@
+from django.db.models import Count, Max
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def get_validators(queryset, *timestamp_fields):
+    """
+    ETag and Last-Modified of a queryset's content, from one aggregate query over
+    the `updated_at` columns of its rows and related rows. The row count is part
+    of the ETag, so deletions invalidate it as well.
+    """
+    return _validators(queryset.order_by().aggregate(**_state(timestamp_fields)))
+
+
+async def aget_validators(queryset, *timestamp_fields):
+    return _validators(await queryset.order_by().aaggregate(**_state(timestamp_fields)))
+
+
+def _state(timestamp_fields):
+    changed = Greatest(*timestamp_fields) if len(timestamp_fields) > 1 else timestamp_fields[0]
+    return {'last_modified': Max(changed), 'count': Count('id', distinct=True)}
+
+
+def _validators(state):
+    last_modified = state['last_modified']
+    if last_modified is None:
+        return quote_etag(f"{state['count']}"), None
+    return (
+        quote_etag(f"{state['count']}-{int(last_modified.timestamp() * 1_000_000)}"),
+        int(last_modified.timestamp())
+    )
+
+
+def not_modified(request, etag, last_modified):
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+    return response
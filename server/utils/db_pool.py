@@ -0,0 +1,35 @@
+import os
+
+from django.db import connections
+
+
+def pool_stats():
+    """
+    Connection pool statistics of this worker process, by database alias.
+    Every worker has its own pools, so the pid tells which one answered.
+    Counters are cumulative since the pool was opened.
+    """
+    pools = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        checkouts = stats.get('requests_num', 0)
+        pools[alias] = {
+            'size': stats['pool_size'],
+            'min_size': stats['pool_min'],
+            'max_size': stats['pool_max'],
+            'in_use': stats['pool_size'] - stats['pool_available'],
+            'idle': stats['pool_available'],
+            'waiting': stats.get('requests_waiting', 0),
+            'checkouts': checkouts,
+            'queued_checkouts': stats.get('requests_queued', 0),
+            'checkout_errors': stats.get('requests_errors', 0),
+            'checkout_wait_ms_total': stats.get('requests_wait_ms', 0),
+            'checkout_wait_ms_avg': stats.get('requests_wait_ms', 0) / checkouts if checkouts else 0.0,
+            'connections_opened': stats.get('connections_num', 0),
+            'connections_lost': stats.get('connections_lost', 0),
+            'bad_returns': stats.get('returns_bad', 0),
+        }
+    return {'pid': os.getpid(), 'pools': pools}
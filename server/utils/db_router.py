@@ -0,0 +1,112 @@
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA = 'replica'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"primary_pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """
+    Keep the user's reads on the primary for REPLICA_STICKY_SECONDS, so they
+    see their own writes even if the replica lags behind.
+    """
+    cache.set(_pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def unpin(user_id):
+    cache.delete(_pin_key(user_id))
+
+
+def pinned_to_primary(user_id):
+    return cache.get(_pin_key(user_id), False)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica while a ReplicaReadsMixin view serves a safe
+    request; everything else, and every write, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and replica_configured():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA}:
+            return True
+        return None
+
+
+class ReplicaReadsMixin:
+    """
+    Serves the view's GET requests from the replica, unless the user wrote
+    something within the last REPLICA_STICKY_SECONDS. Requests running in a
+    transaction (ATOMIC_REQUESTS, TestCase) stay on the primary, since the
+    replica cannot see its uncommitted writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS and
+            replica_configured() and
+            not connections[DEFAULT_DB_ALIAS].in_atomic_block and
+            not pinned_to_primary(request.user.pk)
+        ):
+            _read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # worker threads are reused between requests
+        _read_from_replica.set(False)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _pin_writer(request, response):
+    user = getattr(request, 'user', None)
+    if (
+        request.method not in SAFE_METHODS and
+        response.status_code < 400 and
+        user is not None and
+        user.is_authenticated and
+        replica_configured()
+    ):
+        pin_to_primary(user.pk)
+
+
+@sync_and_async_middleware
+def primary_after_write_middleware(get_response):
+    """
+    Pins users to the primary after a successful write. DRF sets request.user
+    on the underlying request, so JWT users are seen here as well.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            _pin_writer(request, response)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            _pin_writer(request, response)
+            return response
+    return middleware
@@ -0,0 +1,44 @@
+from django.db.models import CASCADE, DO_NOTHING, SET_NULL
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.signals import post_delete, pre_delete
+
+
+def can_delete_set_based(model, _path=()):
+    """
+    Whether rows of `model` (and everything cascading from them) can be deleted
+    with plain SQL statements without changing behaviour: no delete signals,
+    no generic relations, no cycles and only CASCADE/SET_NULL/DO_NOTHING.
+    """
+    if model in _path:
+        return False
+    if pre_delete.has_listeners(model) or post_delete.has_listeners(model):
+        return False
+    if any(hasattr(field, 'bulk_related_objects') for field in model._meta.private_fields):
+        return False
+    for related in get_candidate_relations_to_delete(model._meta):
+        on_delete = related.field.remote_field.on_delete
+        if on_delete is CASCADE:
+            if not can_delete_set_based(related.related_model, (*_path, model)):
+                return False
+        elif on_delete not in (SET_NULL, DO_NOTHING):
+            return False
+    return True
+
+
+def delete_set_based(queryset):
+    """
+    Delete a queryset with one statement per related table instead of loading
+    the rows into Django's deletion collector. Only valid when
+    can_delete_set_based(queryset.model) holds; has to run in a transaction.
+    """
+    for related in get_candidate_relations_to_delete(queryset.model._meta):
+        field = related.field
+        dependants = related.related_model._base_manager.filter(
+            **{f'{field.name}__in': queryset.values(field.target_field.attname)}
+        )
+        if field.remote_field.on_delete is CASCADE:
+            delete_set_based(dependants)
+        elif field.remote_field.on_delete is SET_NULL:
+            dependants.update(**{field.name: None})
+    # dependants are gone, so a raw DELETE is what the collector would end with
+    return queryset._raw_delete(queryset.db)
@@ -0,0 +1,223 @@
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.renderers import JSONRenderer
+
+from .db_pool import pool_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Time spent in each phase of one request. Shared by every thread the
+    request runs queries in, hence the lock.
+    """
+    __slots__ = ('lock', 'phases', 'queries')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.phases = {'db': 0.0, 'auth': 0.0, 'parse': 0.0, 'serialize': 0.0}
+
+    def add(self, phase, seconds, queries=0):
+        with self.lock:
+            self.phases[phase] += seconds
+            self.queries += queries
+
+
+@contextmanager
+def measure(phase):
+    """
+    Add the time spent in the block to `phase` of the current request, if any.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(phase, perf_counter() - start)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add('db', perf_counter() - start, queries=1)
+
+
+def _install_query_recorder(sender, connection, **kwargs):
+    # sent on every (re)connect, including every checkout from the pool
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_recorder)
+
+
+class TimedJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class Histogram:
+    """
+    Cumulative Prometheus histogram, one series per label set.
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self.series.items())]
+        for (view, method), counts, total in series:
+            labels = f'view="{view}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+
+
+REQUEST_DURATION = Histogram(
+    'promotornia_request_duration_seconds', "Total time spent handling the request", DURATION_BUCKETS
+)
+PHASE_DURATIONS = {
+    phase: Histogram(f'promotornia_request_{phase}_duration_seconds', documentation, DURATION_BUCKETS)
+    for phase, documentation in (
+        ('db', "Time spent executing SQL"),
+        ('auth', "Time spent authenticating the request"),
+        ('parse', "Time spent parsing and decamelizing the request body"),
+        ('serialize', "Time spent serializing and rendering the response"),
+    )
+}
+REQUEST_QUERIES = Histogram('promotornia_request_db_queries', "SQL queries executed per request", QUERY_BUCKETS)
+
+
+def _finish(request, response, metrics, start):
+    total = perf_counter() - start
+    match = request.resolver_match
+    labels = ((match.url_name or match.view_name) if match else 'unresolved', request.method)
+
+    REQUEST_DURATION.observe(labels, total)
+    REQUEST_QUERIES.observe(labels, metrics.queries)
+    for phase, seconds in metrics.phases.items():
+        PHASE_DURATIONS[phase].observe(labels, seconds)
+
+    if settings.SERVER_TIMING:
+        response.headers['Server-Timing'] = ", ".join([
+            f'db;dur={metrics.phases["db"] * 1000:.1f};desc="{metrics.queries} queries"',
+            f'auth;dur={metrics.phases["auth"] * 1000:.1f}',
+            f'parse;dur={metrics.phases["parse"] * 1000:.1f}',
+            f'serialize;dur={metrics.phases["serialize"] * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    """
+    Records SQL count and time, auth, parsing, serialization and total time of each
+    request, labelled by URL name, into the histograms served at /metrics and
+    the Server-Timing header.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            start = perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            _finish(request, response, metrics, start)
+            return response
+    else:
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            start = perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            _finish(request, response, metrics, start)
+            return response
+    return middleware
+
+
+def render_metrics():
+    lines = []
+    REQUEST_DURATION.render(lines)
+    REQUEST_QUERIES.render(lines)
+    for histogram in PHASE_DURATIONS.values():
+        histogram.render(lines)
+
+    pools = pool_stats()['pools']
+    for name, documentation in (
+        ('in_use', "Connections checked out of the pool"),
+        ('idle', "Connections waiting in the pool"),
+        ('waiting', "Requests waiting for a connection"),
+    ):
+        lines.append(f"# HELP promotornia_db_pool_{name} {documentation}")
+        lines.append(f"# TYPE promotornia_db_pool_{name} gauge")
+        lines += [f'promotornia_db_pool_{name}{{alias="{alias}"}} {stats[name]}' for alias, stats in pools.items()]
+    lines.append("# HELP promotornia_db_pool_checkout_wait_seconds_total Time spent waiting for pool connections")
+    lines.append("# TYPE promotornia_db_pool_checkout_wait_seconds_total counter")
+    lines += [
+        f'promotornia_db_pool_checkout_wait_seconds_total{{alias="{alias}"}} {stats["checkout_wait_ms_total"] / 1000}'
+        for alias, stats in pools.items()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of this worker's metrics. Requires
+    `Authorization: Bearer <METRICS_TOKEN>`; without METRICS_TOKEN the
+    endpoint does not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        return HttpResponse(status=404)
+    if not constant_time_compare(
+        request.headers.get('Authorization', ''), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')